@@ -0,0 +1,79 @@
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from django.views.decorators.csrf import csrf_exempt
+
+from .views import IngredientViewSet, RecipeViewSet, TagViewSet
+
+READ_METHODS = ('GET', 'HEAD')
+
+
+def read_action(viewset, action, request, kwargs):
+    """
+    Выполнение действия чтения вьюсета без диспетчеризации DRF.
+    Используются те же queryset, фильтры, пагинация, права,
+    сериализаторы, согласование формата и finalize_response, поэтому
+    ответ (включая Vary, Allow и Retry-After) совпадает с синхронным.
+
+    Вызывается в потоке пула, а не в общем потоке sync_to_async:
+    соединения с БД закрываются после каждого вызова, как в конце
+    обычного запроса.
+    """
+    close_old_connections()
+    try:
+        view = viewset(action_map={'get': action, 'head': action})
+        view.args = ()
+        view.kwargs = kwargs
+        view.format_kwarg = None
+        view.headers = {}
+        drf_request = view.initialize_request(request, **kwargs)
+        view.request = drf_request
+        try:
+            view.initial(drf_request, **kwargs)
+            response = getattr(view, action)(drf_request, **kwargs)
+        except Exception as exc:
+            response = view.handle_exception(exc)
+        response = view.finalize_response(drf_request, response, **kwargs)
+        return response.render()
+    finally:
+        close_old_connections()
+
+
+def async_read_view(viewset, actions, read):
+    """
+    Асинхронное представление: GET и HEAD обслуживает действие `read`
+    в потоке пула (thread_sensitive=False), так что чтения выполняются
+    параллельно; остальные методы передаются исходному вьюсету.
+    """
+    sync_view = sync_to_async(viewset.as_view(actions))
+    read_in_thread = sync_to_async(read_action, thread_sensitive=False)
+
+    @csrf_exempt
+    async def view(request, **kwargs):
+        if request.method not in READ_METHODS:
+            return await sync_view(request, **kwargs)
+        return await read_in_thread(viewset, read, request, kwargs)
+
+    return view
+
+
+recipe_list = async_read_view(
+    RecipeViewSet, {'get': 'list', 'post': 'create'}, 'list')
+recipe_detail = async_read_view(
+    RecipeViewSet,
+    {'get': 'retrieve', 'put': 'update', 'patch': 'partial_update',
+     'delete': 'destroy'},
+    'retrieve')
+ingredient_list = async_read_view(
+    IngredientViewSet, {'get': 'list', 'post': 'create'}, 'list')
+ingredient_detail = async_read_view(
+    IngredientViewSet,
+    {'get': 'retrieve', 'put': 'update', 'patch': 'partial_update',
+     'delete': 'destroy'},
+    'retrieve')
+tag_list = async_read_view(
+    TagViewSet, {'get': 'list', 'post': 'create'}, 'list')
+tag_detail = async_read_view(
+    TagViewSet,
+    {'get': 'retrieve', 'put': 'update', 'patch': 'partial_update',
+     'delete': 'destroy'},
+    'retrieve')
@@ -0,0 +1,106 @@
+import logging
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from .cache import LocalTTLCache, process_local_cache
+
+logger = logging.getLogger(__name__)
+
+TOKEN_CACHE_PREFIX = 'auth-token:'
+USER_CACHE_PREFIX = 'auth-user:'
+
+# Поля пользователя, нужные аутентификации и проверке прав. Остальные
+# поля объекта request.user загружаются из БД при обращении.
+AUTH_FIELDS = ('id', 'is_active', 'is_staff', 'is_superuser')
+
+User = get_user_model()
+
+# Отзыв токена и деактивация пользователя должны быть видны всем
+# воркерам сразу. С кэшем в памяти процесса (LocMemCache) удаление
+# в одном воркере не затрагивает остальные, и отозванный токен
+# принимался бы до истечения TOKEN_CACHE_TTL: кэширование отключается.
+SHARED = not process_local_cache()
+
+if not SHARED:
+    logger.warning(
+        'Кэш %s не общий для процессов: токены проверяются по БД '
+        'на каждом запросе. Задайте CACHE_BACKEND (например, Redis).',
+        settings.CACHES['default']['BACKEND'],
+    )
+
+local_tokens = LocalTTLCache(
+    maxsize=getattr(settings, 'TOKEN_LOCAL_CACHE_SIZE', 4096),
+    ttl=getattr(settings, 'TOKEN_LOCAL_CACHE_TTL', 5),
+)
+
+
+def token_cache_key(key):
+    return f'{TOKEN_CACHE_PREFIX}{key}'
+
+
+def user_cache_key(user_id):
+    return f'{USER_CACHE_PREFIX}{user_id}'
+
+
+def invalidate_token(key):
+    """Удаление токена из локального и общего кэша."""
+    local_tokens.delete(key)
+    cache.delete(token_cache_key(key))
+
+
+def invalidate_user(user_id):
+    """Сброс флагов пользователя в кэшах без запроса его токенов."""
+    local_tokens.delete_where(lambda key, flags: flags['id'] == user_id)
+    cache.delete(user_cache_key(user_id))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Токен-аутентификация с кэшированием. Общий кэш хранит токен → ID
+    пользователя и ID → флаги AUTH_FIELDS (без пароля и личных данных),
+    LRU-кэш процесса — токен → флаги. Запрос Token + User к БД
+    выполняется только при промахе обоих. Без общего кэша работает
+    как TokenAuthentication.
+    """
+
+    def authenticate_credentials(self, key):
+        if not SHARED:
+            return super().authenticate_credentials(key)
+        flags = local_tokens.get(key)
+        if flags is None:
+            flags = self.cached_flags(key)
+            local_tokens.set(key, flags)
+        if not flags['is_active']:
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.'))
+        # Отдельный объект на запрос: неполный, остальные поля
+        # подгружаются при обращении.
+        # from_db ожидает значения в порядке полей модели. С указанной
+        # БД save() такого объекта записывает только загруженные поля.
+        names = [
+            field.attname for field in User._meta.concrete_fields
+            if field.attname in flags
+        ]
+        user = User.from_db(
+            router.db_for_read(User), names, [flags[name] for name in names])
+        return user, self.get_model()(key=key, user=user)
+
+    def cached_flags(self, key):
+        ttl = getattr(settings, 'TOKEN_CACHE_TTL', 300)
+        user_id = cache.get(token_cache_key(key))
+        flags = None if user_id is None else cache.get(
+            user_cache_key(user_id))
+        if flags is None:
+            user, _token = super().authenticate_credentials(key)
+            flags = {name: getattr(user, name) for name in AUTH_FIELDS}
+            cache.set_many({
+                token_cache_key(key): user.pk,
+                user_cache_key(user.pk): flags,
+            }, ttl)
+        return flags
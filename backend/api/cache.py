@@ -0,0 +1,67 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+MISSING = object()
+
+# Бэкенды кэша Django, данные которых видны только своему процессу:
+# с ними значение, записанное одним воркером gunicorn, не видят остальные.
+PROCESS_LOCAL_BACKENDS = ('LocMemCache', 'DummyCache')
+
+
+def process_local_cache(alias='default'):
+    """Кэш alias не общий для процессов (LocMemCache, DummyCache)."""
+    backend = settings.CACHES[alias]['BACKEND']
+    return backend.rsplit('.', 1)[-1] in PROCESS_LOCAL_BACKENDS
+
+
+class LocalTTLCache:
+    """Потокобезопасный LRU-кэш процесса с ограничением времени жизни."""
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key, MISSING)
+            if item is MISSING:
+                return default
+            value, expires = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_where(self, predicate):
+        """Удаление записей, для которых predicate(key, value) истинно."""
+        with self._lock:
+            for key in [
+                key for key, (value, _) in self._data.items()
+                if predicate(key, value)
+            ]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
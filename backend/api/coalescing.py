@@ -0,0 +1,175 @@
+"""
+Защита дорогих эндпоинтов от лавины одинаковых запросов.
+
+Результат хранится в общем кэше Django вместе со сроком свежести.
+Свежий результат отдаётся сразу, устаревший — тоже сразу, а один
+процесс пересчитывает его в фоне (stale-while-revalidate). При
+холодном кэше внутри процесса вычисление выполняет один поток
+(single-flight), между процессами и узлами — владелец блокировки
+в кэше, остальные ждут готовый результат. С кэшем в памяти процесса
+(LocMemCache) работает только single-flight.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+from .cache import process_local_cache
+
+logger = logging.getLogger(__name__)
+
+OPTIONS = {
+    'ENABLED': True,
+    'TTL': 10,
+    'STALE_TTL': 60,
+    'LOCK_TIMEOUT': 30,
+    **getattr(settings, 'COALESCING', {}),
+}
+
+# Версии, блокировки и результаты хранятся в общем кэше. С кэшем
+# в памяти процесса смена версии в одном воркере не видна остальным,
+# поэтому остаётся только объединение вычислений внутри процесса.
+SHARED = not process_local_cache()
+
+if OPTIONS['ENABLED'] and not SHARED:
+    logger.warning(
+        'Кэш %s не общий для процессов: запросы объединяются только '
+        'внутри процесса, без общего кэша результатов. Задайте '
+        'CACHE_BACKEND (например, Redis или Memcached).',
+        settings.CACHES['default']['BACKEND'],
+    )
+
+
+class Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """Одно вычисление на ключ в процессе, остальные потоки ждут его."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, function):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = Call()
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+        try:
+            call.value = function()
+        except Exception as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.value
+
+
+flights = SingleFlight()
+
+
+def version_key(name):
+    return f'version:{name}'
+
+
+def versions(*names):
+    """
+    Текущие версии наборов данных для ключа кэша. Отсутствующая версия
+    инициализируется временем, чтобы после вытеснения из кэша не
+    совпасть со старыми ключами.
+    """
+    keys = [version_key(name) for name in names]
+    found = cache.get_many(keys)
+    missing = {
+        key: int(time.time() * 1000) for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, None)
+        found.update(missing)
+    return ':'.join(str(found[key]) for key in keys)
+
+
+def bump(name):
+    """Смена версии набора данных: старые ключи больше не читаются."""
+    try:
+        cache.incr(version_key(name))
+    except ValueError:
+        cache.set(version_key(name), int(time.time() * 1000), None)
+
+
+def lock_key(key):
+    return f'{key}:lock'
+
+
+def store(key, value, ttl, stale_ttl):
+    cache.set(
+        key, {'value': value, 'expires': time.time() + ttl}, ttl + stale_ttl)
+    return value
+
+
+def fill(key, compute, ttl, stale_ttl, lock_timeout):
+    if cache.add(lock_key(key), 1, lock_timeout):
+        try:
+            return store(key, compute(), ttl, stale_ttl)
+        finally:
+            cache.delete(lock_key(key))
+    deadline = time.monotonic() + lock_timeout
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry['value']
+        if cache.get(lock_key(key)) is None:
+            break
+    return store(key, compute(), ttl, stale_ttl)
+
+
+def refresh(key, compute, ttl, stale_ttl):
+    try:
+        store(key, compute(), ttl, stale_ttl)
+    except Exception:
+        logger.exception('Фоновый пересчёт %s не удался.', key)
+    finally:
+        cache.delete(lock_key(key))
+        connections.close_all()
+
+
+def coalesce(key, compute, ttl=None, stale_ttl=None):
+    """
+    Значение compute() для ключа key с защитой от лавины запросов.
+    compute должен возвращать сериализуемый для кэша результат.
+    """
+    if not OPTIONS['ENABLED']:
+        return compute()
+    if not SHARED:
+        return flights.do(key, compute)
+    ttl = OPTIONS['TTL'] if ttl is None else ttl
+    stale_ttl = OPTIONS['STALE_TTL'] if stale_ttl is None else stale_ttl
+    lock_timeout = OPTIONS['LOCK_TIMEOUT']
+    entry = cache.get(key)
+    if entry is not None:
+        if (
+            entry['expires'] < time.time()
+            and cache.add(lock_key(key), 1, lock_timeout)
+        ):
+            threading.Thread(
+                target=refresh, args=(key, compute, ttl, stale_ttl),
+                daemon=True,
+            ).start()
+        return entry['value']
+    return flights.do(
+        key, lambda: fill(key, compute, ttl, stale_ttl, lock_timeout))
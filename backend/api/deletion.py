@@ -0,0 +1,190 @@
+"""
+Фоновое удаление пользователей и рецептов с большим числом зависимых
+строк. Каскад Django загружает все связанные объекты в память и
+удаляет их одной транзакцией; здесь объект сразу скрывается, а
+зависимые таблицы очищаются пачками по batch_size строк, каждая в своей
+короткой транзакции вместе с отметкой прогресса. Прерванное задание
+продолжается с места остановки.
+
+Строки избранного, корзины, ингредиентов и тегов удаляются SQL без
+сигналов: клиенты синхронизации узнают об удалении по отметке рецепта.
+Сами рецепты и пользователь удаляются ORM, когда зависимых строк уже
+нет, поэтому их сигналы (отметки, инвалидация кэшей) срабатывают.
+"""
+import logging
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.utils import timezone
+from recipes.models import (DeletionJob, Favourite, IngredientInRecipe,
+                            Recipe, RecipeScore, ShoppingCart)
+from rest_framework.authtoken.models import Token
+from users.models import Subscribe
+
+from .coalescing import bump
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+BATCH_SIZE = 1000
+
+# Таблицы, ссылающиеся на рецепт, в порядке очистки.
+RECIPE_DEPENDENTS = (
+    Favourite, ShoppingCart, IngredientInRecipe,
+    Recipe.tags.through, RecipeScore,
+)
+
+
+def schedule_recipe_deletion(recipe):
+    """Рецепт скрывается сразу и ставится в очередь на удаление."""
+    with transaction.atomic():
+        now = timezone.now()
+        Recipe.all_objects.filter(pk=recipe.pk).update(
+            deleted_at=now, updated_at=now)
+        transaction.on_commit(lambda: bump('recipes'))
+        return DeletionJob.objects.create(
+            model=DeletionJob.RECIPE, object_id=recipe.pk)
+
+
+def schedule_user_deletion(user):
+    """
+    Пользователь деактивируется, его токены удаляются, рецепты
+    скрываются; остальное удаляет run_deletion_worker.
+    """
+    with transaction.atomic():
+        # save(), а не UPDATE: post_save сбрасывает кэшированные флаги
+        # пользователя во всех воркерах.
+        user.is_active = False
+        user.save(update_fields=('is_active',))
+        now = timezone.now()
+        Recipe.objects.filter(author=user).update(
+            deleted_at=now, updated_at=now)
+        Token.objects.filter(user=user).delete()
+        transaction.on_commit(lambda: bump('recipes'))
+        return DeletionJob.objects.create(
+            model=DeletionJob.USER, object_id=user.pk)
+
+
+def table(model):
+    return connection.ops.quote_name(model._meta.db_table)
+
+
+def column(model, name):
+    return connection.ops.quote_name(model._meta.get_field(name).column)
+
+
+class Deleter:
+    """Выполнение одного задания удаления с учётом прогресса."""
+
+    def __init__(self, job, batch_size=BATCH_SIZE, report=None):
+        self.job = job
+        self.batch_size = batch_size
+        self.report = report
+
+    def advance(self, label, count):
+        """
+        Отметка прогресса. started_at служит пульсом: задание, которое
+        продвигается, не считается брошенным (jobs.STALE_AFTER) и не
+        забирается вторым воркером.
+        """
+        self.job.progress[label] = self.job.progress.get(label, 0) + count
+        DeletionJob.objects.filter(pk=self.job.pk).update(
+            progress=self.job.progress, started_at=timezone.now())
+        if self.report is not None:
+            self.report(self.job)
+
+    def delete_rows(self, model, where, params, before=None):
+        """
+        DELETE строк model, подходящих под условие where, пачками.
+        before(cursor, ids) выполняется в той же транзакции до удаления.
+        """
+        pk = connection.ops.quote_name(model._meta.pk.column)
+        select = f'SELECT {pk} FROM {table(model)} WHERE {where} LIMIT %s'
+        # Строки пачки блокируются: если задание всё же выполняют два
+        # воркера, второй не изменит счётчики по тем же строкам.
+        if connection.features.has_select_for_update_skip_locked:
+            select += ' FOR UPDATE SKIP LOCKED'
+        while True:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(select, [*params, self.batch_size])
+                ids = [row[0] for row in cursor.fetchall()]
+                if not ids:
+                    return
+                if before is not None:
+                    before(cursor, ids)
+                cursor.execute(
+                    f'DELETE FROM {table(model)} WHERE {pk} IN '
+                    f'({", ".join(["%s"] * len(ids))})',
+                    ids,
+                )
+                self.advance(model._meta.db_table, len(ids))
+
+    def delete_recipes(self, field, value):
+        """Рецепты с field = value: сначала зависимые строки, затем сами."""
+        recipe_ids = (
+            f'IN (SELECT {column(Recipe, "id")} FROM {table(Recipe)} '
+            f'WHERE {column(Recipe, field)} = %s)'
+        )
+        for model in RECIPE_DEPENDENTS:
+            self.delete_rows(
+                model, f'{column(model, "recipe")} {recipe_ids}', [value])
+        while True:
+            with transaction.atomic():
+                ids = list(
+                    Recipe.all_objects.select_for_update(skip_locked=True)
+                    .filter(**{field: value})
+                    .values_list('pk', flat=True)[:self.batch_size])
+                if not ids:
+                    return
+                Recipe.all_objects.filter(pk__in=ids).delete()
+                self.advance(Recipe._meta.db_table, len(ids))
+
+    def release_counters(self, side, counter):
+        """Уменьшение счётчиков второй стороны удаляемых подписок."""
+        def before(cursor, ids):
+            cursor.execute(
+                f'UPDATE {table(User)} SET {counter} = {counter} - 1 '
+                f'WHERE {column(User, "id")} IN ('
+                f'SELECT {column(Subscribe, side)} FROM {table(Subscribe)} '
+                f'WHERE {column(Subscribe, "id")} IN '
+                f'({", ".join(["%s"] * len(ids))}))',
+                ids,
+            )
+        return before
+
+    def delete_user(self, user_id):
+        self.delete_recipes('author', user_id)
+        for model in (Favourite, ShoppingCart):
+            self.delete_rows(model, f'{column(model, "user")} = %s', [user_id])
+        self.delete_rows(
+            Subscribe, f'{column(Subscribe, "user")} = %s', [user_id],
+            before=self.release_counters('author', 'followers_count'))
+        self.delete_rows(
+            Subscribe, f'{column(Subscribe, "author")} = %s', [user_id],
+            before=self.release_counters('user', 'following_count'))
+        # Оставшиеся связи (токены, выгрузки, журнал админки) невелики.
+        User.objects.filter(pk=user_id).delete()
+        self.advance(User._meta.db_table, 1)
+
+    def run(self):
+        if self.job.model == DeletionJob.USER:
+            self.delete_user(self.job.object_id)
+        else:
+            self.delete_recipes('id', self.job.object_id)
+
+
+def run(job, batch_size=BATCH_SIZE, report=None):
+    """Выполнение задания удаления; ошибка помечает задание FAILED."""
+    try:
+        Deleter(job, batch_size, report).run()
+    except Exception as error:
+        logger.exception('Удаление %s не удалось.', job.pk)
+        job.status = DeletionJob.FAILED
+        job.error = str(error)
+    else:
+        job.status = DeletionJob.DONE
+    job.finished_at = timezone.now()
+    job.save(update_fields=('status', 'error', 'finished_at'))
+    bump('recipes')
+    return job
@@ -0,0 +1,84 @@
+"""
+Фоновые выгрузки без внешнего брокера: задания хранятся в таблице
+ExportJob и выполняются процессом run_export_worker (см. api.jobs).
+Готовый файл отдаётся повторно, пока не изменится отпечаток исходных
+данных (корзина, рецепты в ней, их ингредиенты, имя пользователя).
+"""
+import hashlib
+import logging
+import uuid
+
+from django.core.files.base import ContentFile
+from django.db.models import Count, Max
+from django.utils import timezone
+from recipes.models import ExportJob, ShoppingCart
+
+from .shopping_list import build_shopping_list
+
+logger = logging.getLogger(__name__)
+
+
+def shopping_list_fingerprint(user):
+    data = ShoppingCart.objects.filter(user=user).aggregate(
+        count=Count('id', distinct=True),
+        added=Max('updated_at'),
+        recipes=Max('recipe__updated_at'),
+        ingredients=Max('recipe__ingredients__updated_at'),
+    )
+    return (user.first_name, user.last_name, *data.values())
+
+
+# Тип выгрузки: (построение содержимого, отпечаток данных, расширение).
+EXPORTS = {
+    ExportJob.SHOPPING_LIST: (
+        build_shopping_list, shopping_list_fingerprint, 'txt'),
+}
+
+
+def fingerprint(user, kind):
+    _, source, _ = EXPORTS[kind]
+    return hashlib.sha1(repr(source(user)).encode()).hexdigest()
+
+
+def enqueue(user, kind=ExportJob.SHOPPING_LIST):
+    """
+    Задание выгрузки для пользователя: готовое или ожидающее задание
+    по тем же данным переиспользуется, иначе создаётся новое.
+    """
+    current = fingerprint(user, kind)
+    job = ExportJob.objects.filter(
+        user=user, kind=kind, fingerprint=current,
+    ).exclude(status=ExportJob.FAILED).order_by('-created_at').first()
+    if job is None:
+        return ExportJob.objects.create(
+            user=user, kind=kind, fingerprint=current)
+    return job
+
+
+def run(job):
+    """Построение файла выгрузки и удаление устаревших результатов."""
+    build, _, extension = EXPORTS[job.kind]
+    try:
+        content = build(job.user)
+    except Exception as error:
+        logger.exception('Выгрузка %s не удалась.', job.pk)
+        job.status = ExportJob.FAILED
+        job.error = str(error)
+        job.finished_at = timezone.now()
+        job.save(update_fields=('status', 'error', 'finished_at'))
+        return job
+    job.file.save(
+        f'{job.kind}-{uuid.uuid4().hex}.{extension}',
+        ContentFile(content.encode()),
+        save=False,
+    )
+    job.status = ExportJob.DONE
+    job.finished_at = timezone.now()
+    job.save(update_fields=('file', 'status', 'finished_at'))
+    ExportJob.objects.filter(
+        user_id=job.user_id,
+        kind=job.kind,
+        created_at__lt=job.created_at,
+        status__in=(ExportJob.DONE, ExportJob.FAILED),
+    ).delete()
+    return job
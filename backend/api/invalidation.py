@@ -0,0 +1,208 @@
+"""
+Шина инвалидации кэшей процессов.
+
+Изменения моделей публикуются событием {model, pk}. В PostgreSQL
+событие уходит через NOTIFY и доставляется при фиксации транзакции
+всем воркерам и узлам, где поток-слушатель (LISTEN) вытесняет
+соответствующие записи из локальных кэшей. Для тестов и окружений
+без PostgreSQL есть шина в памяти процесса.
+"""
+import json
+import logging
+import os
+import select
+import socket
+import threading
+import time
+from collections import defaultdict, deque
+
+from django.conf import settings
+from django.db import connections, transaction
+
+logger = logging.getLogger(__name__)
+
+
+def origin():
+    # PID берётся при каждом вызове: при preload модуль импортируется
+    # в мастере до fork.
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+class Registry:
+    """Локальные кэши процесса и правила их очистки по моделям."""
+
+    def __init__(self):
+        self._handlers = defaultdict(list)
+        self.latencies = deque(maxlen=1000)
+
+    def register(self, label, cache, evict=None):
+        """
+        Подписка кэша на изменения модели `label` ('app_label.model').
+        evict(cache, pk) вытесняет записи объекта; без него кэш
+        очищается целиком.
+        """
+        self._handlers[label.lower()].append((cache, evict))
+
+    def handles(self, label):
+        """Есть ли кэши, подписанные на изменения модели label."""
+        return bool(self._handlers.get(label.lower()))
+
+    def dispatch(self, event, local=False):
+        for cache, evict in self._handlers.get(event['model'], ()):
+            if evict is None:
+                cache.clear()
+            else:
+                evict(cache, event['pk'])
+        if not local and 'sent' in event:
+            self.latencies.append(time.time() - event['sent'])
+
+    def clear_all(self):
+        for handlers in self._handlers.values():
+            for cache, _ in handlers:
+                cache.clear()
+
+    def latency_stats(self):
+        """Задержка доставки событий от публикации до вытеснения, мс."""
+        values = sorted(self.latencies)
+        if not values:
+            return {'events': 0}
+        return {
+            'events': len(values),
+            'p50_ms': round(values[len(values) // 2] * 1000, 3),
+            'max_ms': round(values[-1] * 1000, 3),
+        }
+
+
+class MemoryBus:
+    """Шина в памяти процесса для тестов: подписчики (например,
+    реестры, изображающие другие воркеры) получают события после
+    фиксации транзакции."""
+
+    def __init__(self):
+        self.subscribers = []
+
+    def subscribe(self, callback):
+        self.subscribers.append(callback)
+
+    def send(self, event):
+        def deliver():
+            for callback in list(self.subscribers):
+                callback(event)
+
+        transaction.on_commit(deliver)
+
+    def start(self, registry):
+        pass
+
+    def stop(self):
+        pass
+
+
+class PostgresBus:
+    """Шина на LISTEN/NOTIFY PostgreSQL с потоком-слушателем."""
+
+    def __init__(self, channel, using='default'):
+        self.channel = channel
+        self.using = using
+        self._stop = threading.Event()
+        self._thread = None
+
+    def send(self, event):
+        # NOTIFY транзакционный: слушатели получат событие после COMMIT,
+        # при откате транзакции оно не уйдёт.
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(
+                'SELECT pg_notify(%s, %s)', (self.channel, json.dumps(event)))
+
+    def start(self, registry):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self.listen, args=(registry,),
+            name='cache-invalidation', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def connect(self):
+        import psycopg2
+        from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+        params = connections[self.using].get_connection_params()
+        conn = psycopg2.connect(**params)
+        conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+        with conn.cursor() as cursor:
+            cursor.execute(f'LISTEN "{self.channel}";')
+        return conn
+
+    def listen(self, registry):
+        backoff = 1
+        while not self._stop.is_set():
+            try:
+                conn = self.connect()
+            except Exception:
+                logger.exception('Нет соединения для LISTEN.')
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 30)
+                continue
+            backoff = 1
+            # Пока слушатель был отключён, события могли потеряться.
+            registry.clear_all()
+            try:
+                self.poll(conn, registry)
+            except Exception:
+                logger.exception('Слушатель инвалидации упал.')
+            finally:
+                conn.close()
+
+    def poll(self, conn, registry):
+        while not self._stop.is_set():
+            if select.select([conn], [], [], 5) == ([], [], []):
+                continue
+            conn.poll()
+            while conn.notifies:
+                event = json.loads(conn.notifies.pop(0).payload)
+                if event.get('origin') != origin():
+                    registry.dispatch(event)
+
+
+def create_bus():
+    options = getattr(settings, 'CACHE_INVALIDATION', {})
+    backend = options.get('BACKEND')
+    if backend is None:
+        engine = settings.DATABASES['default']['ENGINE']
+        backend = 'postgres' if 'postgresql' in engine else 'memory'
+    if backend == 'postgres':
+        return PostgresBus(options.get('CHANNEL', 'cache_invalidation'))
+    return MemoryBus()
+
+
+registry = Registry()
+bus = create_bus()
+
+
+def publish(instance):
+    """
+    Публикация изменения объекта: свой процесс очищает кэши после
+    фиксации транзакции, остальные получают событие через шину.
+    Изменения моделей без подписанных кэшей не публикуются: NOTIFY
+    стоит запроса и общей блокировки очереди при фиксации.
+    """
+    label = instance._meta.label_lower
+    if not registry.handles(label):
+        return
+    event = {
+        'model': label,
+        'pk': instance.pk,
+        'origin': origin(),
+        'sent': time.time(),
+    }
+    transaction.on_commit(lambda: registry.dispatch(event, local=True))
+    bus.send(event)
+
+
+def start_listener():
+    """Запуск слушателя в воркере (хук gunicorn post_worker_init)."""
+    bus.start(registry)
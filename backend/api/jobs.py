@@ -0,0 +1,51 @@
+"""
+Очереди заданий в таблицах БД (наследники recipes.models.Job) без
+внешнего брокера: воркеры забирают задания через
+SELECT ... FOR UPDATE SKIP LOCKED и могут работать параллельно.
+"""
+import time
+from datetime import timedelta
+
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+# Задание в статусе running дольше STALE_AFTER считается брошенным
+# упавшим воркером и выполняется повторно, но не больше MAX_ATTEMPTS раз.
+STALE_AFTER = timedelta(minutes=10)
+MAX_ATTEMPTS = 3
+
+
+def claim(model):
+    """Следующее задание очереди, помеченное как выполняемое, или None."""
+    now = timezone.now()
+    stale = Q(status=model.RUNNING, started_at__lt=now - STALE_AFTER)
+    model.objects.filter(stale, attempts__gte=MAX_ATTEMPTS).update(
+        status=model.FAILED, error='Превышено число попыток.',
+        finished_at=now)
+    with transaction.atomic():
+        job = model.objects.select_for_update(skip_locked=True).filter(
+            Q(status=model.PENDING) | stale
+        ).order_by('created_at').first()
+        if job is None:
+            return None
+        job.status = model.RUNNING
+        job.started_at = now
+        job.attempts += 1
+        job.save(update_fields=('status', 'started_at', 'attempts'))
+    return job
+
+
+def work(model, run, once=False, interval=1.0, report=None):
+    """Цикл воркера: выполнение заданий run(job) по мере появления."""
+    while True:
+        close_old_connections()
+        job = claim(model)
+        if job is None:
+            if once:
+                return
+            time.sleep(interval)
+            continue
+        run(job)
+        if report is not None:
+            report(job)
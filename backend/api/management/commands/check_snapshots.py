@@ -0,0 +1,28 @@
+from api.read_model import check_snapshots, rebuild_snapshots
+from django.core.management.base import BaseCommand, CommandError
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    """
+    Команда 'check_snapshots' сравнивает снимки рецептов с актуальными
+    данными и при --fix пересобирает расходящиеся.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        mismatched = check_snapshots(batch_size=options['batch_size'])
+        if not mismatched:
+            self.stdout.write('Все снимки актуальны.')
+            return
+        self.stdout.write(
+            f'Расходятся снимки {len(mismatched)} рецептов: '
+            f'{", ".join(map(str, mismatched[:50]))}')
+        if options['fix']:
+            rebuild_snapshots(Recipe.objects.filter(pk__in=mismatched))
+            self.stdout.write('Снимки пересобраны.')
+        else:
+            raise CommandError('Снимки не согласованы с данными.')
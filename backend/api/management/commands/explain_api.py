@@ -0,0 +1,160 @@
+import json
+from datetime import timedelta
+
+from api.querysets import (recipes_for_read, recipes_from_snapshots,
+                           users_for_read)
+from api.shopping_list import shopping_list_items
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from recipes.models import (ExportJob, Favourite, Ingredient,
+                            IngredientInRecipe, Recipe, Tag)
+from users.models import Subscribe
+
+User = get_user_model()
+
+PAGE_SIZE = 6
+
+
+def hot_queries(user, author, recipe_ids, slugs):
+    """Запросы вьюсетов api и users в том виде, в каком их строят вью."""
+    recipes = recipes_for_read(user)
+    now = timezone.now()
+    return {
+        'recipes.list': recipes[:PAGE_SIZE],
+        'recipes.list.snapshot': recipes_from_snapshots(user)[:PAGE_SIZE],
+        'recipes.list.author': recipes.filter(author=author)[:PAGE_SIZE],
+        'recipes.list.tags': recipes.filter(
+            tags__slug__in=slugs).distinct()[:PAGE_SIZE],
+        'recipes.list.is_favorited': recipes.filter(
+            favorites__user=user)[:PAGE_SIZE],
+        'recipes.list.is_in_shopping_cart': recipes.filter(
+            shopping_cart__user=user)[:PAGE_SIZE],
+        'recipes.list.trending': recipes.filter(
+            score__isnull=False,
+        ).order_by('-score__trending', '-score__recipe')[:PAGE_SIZE],
+        'recipes.retrieve': recipes.filter(pk=recipe_ids[0]),
+        'recipes.prefetch.tags': Tag.objects.filter(recipes__in=recipe_ids),
+        'recipes.prefetch.ingredients': (
+            IngredientInRecipe.objects.filter(recipe__in=recipe_ids)
+            .select_related('ingredient').order_by('ingredient__name')),
+        'recipes.favorite.exists': Favourite.objects.filter(
+            user=user, recipe_id=recipe_ids[0]),
+        'recipes.download_shopping_cart': shopping_list_items(user),
+        'ingredients.search': Ingredient.objects.filter(
+            name__istartswith='са')[:PAGE_SIZE],
+        'users.list': users_for_read(user)[:PAGE_SIZE],
+        'users.subscriptions': User.objects.filter(
+            following__user=user)[:PAGE_SIZE],
+        'users.followers': users_for_read(
+            user, User.objects.filter(subscriber__author=author),
+        ).order_by('-id')[:PAGE_SIZE + 1],
+        'sync.recipes': Recipe.objects.filter(
+            updated_at__gt=now - timedelta(hours=1), updated_at__lte=now),
+        'exports.claim': ExportJob.objects.filter(
+            status=ExportJob.PENDING).order_by('created_at')[:1],
+    }
+
+
+def walk(plan):
+    yield plan
+    for child in plan.get('Plans', ()):
+        yield from walk(child)
+
+
+class Command(BaseCommand):
+    """
+    Команда 'explain_api' выполняет горячие запросы API через
+    EXPLAIN (ANALYZE, BUFFERS) на заполненной базе (generate_data),
+    отмечает последовательные сканирования больших таблиц и, при
+    сравнении с сохранённым базовым прогоном, регрессии планов.
+    Завершается ошибкой, если найдены проблемы.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-rows', type=int, default=1000,
+            help='Сканирование таблиц меньшего размера не отмечается.')
+        parser.add_argument(
+            '--baseline', help='JSON прошлого прогона для сравнения.')
+        parser.add_argument(
+            '--save', help='Сохранить результаты прогона в JSON.')
+        parser.add_argument(
+            '--factor', type=float, default=2.0,
+            help='Во сколько раз должна вырасти стоимость для регрессии.')
+        parser.add_argument('--verbose-plans', action='store_true')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('EXPLAIN ANALYZE требует PostgreSQL.')
+        subscription = Subscribe.objects.select_related(
+            'user', 'author').first()
+        recipe_ids = list(Recipe.objects.values_list('pk', flat=True)[:10])
+        if subscription is None or not recipe_ids:
+            raise CommandError('База пуста: запустите generate_data.')
+        slugs = list(Tag.objects.values_list('slug', flat=True)[:2])
+        sizes = self.table_sizes()
+
+        results = {}
+        problems = []
+        queries = hot_queries(
+            subscription.user, subscription.author, recipe_ids, slugs)
+        for name, queryset in queries.items():
+            plan = json.loads(queryset.explain(
+                format='json', analyze=True, buffers=True))[0]
+            if options['verbose_plans']:
+                self.stdout.write(json.dumps(plan, indent=2))
+            row = {
+                'cost': plan['Plan']['Total Cost'],
+                'time_ms': plan['Execution Time'],
+                'seq_scans': sorted({
+                    node['Relation Name'] for node in walk(plan['Plan'])
+                    if node['Node Type'] == 'Seq Scan'
+                    and sizes.get(node['Relation Name'], 0)
+                    >= options['min_rows']
+                }),
+            }
+            results[name] = row
+            for table in row['seq_scans']:
+                problems.append(
+                    f'{name}: последовательное сканирование {table} '
+                    f'({int(sizes[table])} строк)')
+            self.stdout.write(
+                f'{name:<36} {row["time_ms"]:>9.3f} ms  '
+                f'cost {row["cost"]:>10.1f}')
+
+        if options['baseline']:
+            problems += self.regressions(
+                results, options['baseline'], options['factor'])
+        if options['save']:
+            with open(options['save'], 'w', encoding='utf-8') as f:
+                json.dump(results, f, ensure_ascii=False, indent=2)
+        if problems:
+            for problem in problems:
+                self.stderr.write(problem)
+            raise CommandError(f'Найдено проблем: {len(problems)}.')
+        self.stdout.write(self.style.SUCCESS('Проблем не найдено.'))
+
+    def table_sizes(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT relname, reltuples FROM pg_class WHERE relkind = 'r'")
+            return dict(cursor.fetchall())
+
+    def regressions(self, results, path, factor):
+        with open(path, encoding='utf-8') as f:
+            baseline = json.load(f)
+        problems = []
+        for name, row in results.items():
+            old = baseline.get(name)
+            if old is None:
+                continue
+            if row['cost'] > old['cost'] * factor:
+                problems.append(
+                    f'{name}: стоимость {old["cost"]:.1f} -> '
+                    f'{row["cost"]:.1f}')
+            for table in set(row['seq_scans']) - set(old['seq_scans']):
+                problems.append(
+                    f'{name}: новое последовательное сканирование {table}')
+        return problems
@@ -0,0 +1,38 @@
+from api.read_model import rebuild_snapshots, watch_snapshots
+from django.core.management.base import BaseCommand
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    """
+    Команда 'rebuild_snapshots' пересобирает денормализованные снимки
+    рецептов (все или только отсутствующие). С --watch работает
+    постоянно и пересобирает снимки, сброшенные изменениями данных.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--missing', action='store_true',
+            help='Только рецепты без снимка.')
+        parser.add_argument(
+            '--watch', action='store_true',
+            help='Пересобирать сброшенные снимки по мере появления.')
+        parser.add_argument(
+            '--interval', type=float, default=1.0,
+            help='Пауза между проверками в режиме --watch, с.')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        if options['watch']:
+            watch_snapshots(
+                interval=options['interval'],
+                batch_size=options['batch_size'],
+                report=lambda count: self.stdout.write(
+                    f'Пересобрано снимков: {count}.'),
+            )
+            return
+        queryset = Recipe.objects.all()
+        if options['missing']:
+            queryset = queryset.filter(snapshot__isnull=True)
+        count = rebuild_snapshots(queryset, options['batch_size'])
+        self.stdout.write(f'Пересобрано снимков: {count}.')
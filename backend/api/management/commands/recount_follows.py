@@ -0,0 +1,21 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from foodgram.admin import related_count
+from users.models import Subscribe
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """
+    Команда 'recount_follows' пересчитывает счётчики подписчиков и
+    подписок по таблице Subscribe, например после bulk_create подписок
+    или первого развёртывания счётчиков.
+    """
+
+    def handle(self, *args, **options):
+        updated = User.objects.update(
+            followers_count=related_count(Subscribe, 'author'),
+            following_count=related_count(Subscribe, 'user'),
+        )
+        self.stdout.write(f'Пересчитаны счётчики {updated} пользователей.')
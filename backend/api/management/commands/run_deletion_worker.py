@@ -0,0 +1,40 @@
+from functools import partial
+
+from api.deletion import BATCH_SIZE, run
+from api.jobs import work
+from django.core.management.base import BaseCommand
+from recipes.models import DeletionJob
+
+
+class Command(BaseCommand):
+    """
+    Команда 'run_deletion_worker' выполняет задания фонового удаления
+    пользователей и рецептов, печатая прогресс по таблицам.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить очередь и завершиться.')
+        parser.add_argument(
+            '--interval', type=float, default=1.0,
+            help='Пауза между опросами пустой очереди, с.')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            '--verbose-progress', action='store_true',
+            help='Печатать прогресс после каждой пачки.')
+
+    def handle(self, *args, **options):
+        progress = self.progress if options['verbose_progress'] else None
+        work(
+            DeletionJob,
+            partial(run, batch_size=options['batch_size'], report=progress),
+            once=options['once'],
+            interval=options['interval'],
+            report=self.progress,
+        )
+
+    def progress(self, job):
+        done = ', '.join(
+            f'{name}: {count}' for name, count in job.progress.items())
+        self.stdout.write(f'Удаление {job}. {done}')
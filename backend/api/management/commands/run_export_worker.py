@@ -0,0 +1,28 @@
+from api.exports import run
+from api.jobs import work
+from django.core.management.base import BaseCommand
+from recipes.models import ExportJob
+
+
+class Command(BaseCommand):
+    """
+    Команда 'run_export_worker' выполняет задания фоновых выгрузок из
+    очереди в БД. Несколько воркеров могут работать одновременно.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить очередь и завершиться.')
+        parser.add_argument(
+            '--interval', type=float, default=1.0,
+            help='Пауза между опросами пустой очереди, с.')
+
+    def handle(self, *args, **options):
+        work(
+            ExportJob, run,
+            once=options['once'],
+            interval=options['interval'],
+            report=lambda job: self.stdout.write(
+                f'Выгрузка {job.pk}: {job.status}.'),
+        )
@@ -0,0 +1,98 @@
+import cProfile
+import random
+import re
+
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from rest_framework import exceptions
+
+from . import profiling
+from .authentication import CachedTokenAuthentication
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ACCEPTS_BROTLI = re.compile(r'\bbr\b')
+MIN_COMPRESS_LENGTH = 200
+
+
+class BrotliMiddleware(MiddlewareMixin):
+    """
+    Сжатие ответа Brotli, если клиент его принимает. Ставится в
+    MIDDLEWARE после GZipMiddleware: уже сжатый ответ GZipMiddleware
+    пропускает, остальным клиентам достаётся gzip. Без пакета
+    brotli ничего не делает.
+    """
+
+    def process_response(self, request, response):
+        if (
+            brotli is None
+            or response.streaming
+            or response.has_header('Content-Encoding')
+            or len(response.content) < MIN_COMPRESS_LENGTH
+        ):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if not ACCEPTS_BROTLI.search(
+                request.META.get('HTTP_ACCEPT_ENCODING', '')):
+            return response
+        compressed = brotli.compress(response.content, quality=5)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = 'br'
+        # Как и GZipMiddleware, помечаем ETag слабым.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Профилирование запроса cProfile для персонала по заголовку
+    PROFILING['HEADER'] и для доли SAMPLE_RATE запросов. Идентификатор
+    профиля возвращается в X-Profile-Id. При выключенном профилировании
+    Django исключает middleware из цепочки.
+    """
+
+    def __init__(self, get_response):
+        if not profiling.OPTIONS['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.header = 'HTTP_' + profiling.OPTIONS['HEADER'].upper().replace(
+            '-', '_')
+        self.sample_rate = profiling.OPTIONS['SAMPLE_RATE']
+
+    def __call__(self, request):
+        requested = self.header in request.META and self.is_staff(request)
+        if not requested and random.random() >= self.sample_rate:
+            return self.get_response(request)
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            profile.disable()
+        match = request.resolver_match
+        view = (match.view_name or match.route) if match else 'unresolved'
+        profile_id = profiling.save(profile, view)
+        if requested:
+            response['X-Profile-Id'] = profile_id
+        return response
+
+    def is_staff(self, request):
+        # Токен DRF проверяется во вью, поэтому здесь — отдельно
+        # и только для запросов с заголовком профилирования.
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_staff:
+            return True
+        try:
+            result = CachedTokenAuthentication().authenticate(request)
+        except exceptions.AuthenticationFailed:
+            return False
+        return result is not None and result[0].is_staff
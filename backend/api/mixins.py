@@ -0,0 +1,45 @@
+from rest_framework import exceptions
+from rest_framework.response import Response
+
+
+class BatchListMixin:
+    """
+    Пакетное получение объектов списком ID: ?ids=1,2,3. Объекты
+    выбираются одним запросом и возвращаются в порядке ID из запроса,
+    ненайденные ID перечисляются в missing.
+    """
+    batch_query_param = 'ids'
+    batch_max_size = 100
+
+    def list(self, request, *args, **kwargs):
+        value = request.query_params.get(self.batch_query_param)
+        if value is None:
+            return super().list(request, *args, **kwargs)
+        ids = self.parse_batch_ids(value)
+        objects = {
+            obj.pk: obj for obj in
+            self.filter_queryset(self.get_queryset()).filter(pk__in=ids)
+        }
+        serializer = self.get_serializer(
+            [objects[pk] for pk in ids if pk in objects], many=True)
+        return Response({
+            'results': serializer.data,
+            'missing': [pk for pk in ids if pk not in objects],
+        })
+
+    def parse_batch_ids(self, value):
+        try:
+            ids = [int(item) for item in value.split(',') if item.strip()]
+        except ValueError:
+            raise exceptions.ValidationError(
+                {self.batch_query_param: 'ID должны быть целыми числами.'})
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            raise exceptions.ValidationError(
+                {self.batch_query_param: 'Не передано ни одного ID.'})
+        if len(ids) > self.batch_max_size:
+            raise exceptions.ValidationError({
+                self.batch_query_param:
+                    f'Не больше {self.batch_max_size} ID за запрос.'
+            })
+        return ids
@@ -1,7 +1,18 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
 
 class LimitPageNumberPagination(PageNumberPagination):
     """Пагинация страниц."""
     page_size_query_param = 'limit'
     page_size = 6
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Пагинация по ключу: страница выбирается условием id < курсор по
+    индексу, без OFFSET и COUNT(*), поэтому не замедляется в глубине.
+    """
+    ordering = '-id'
+    page_size_query_param = 'limit'
+    page_size = 6
+    max_page_size = 100
@@ -0,0 +1,79 @@
+"""
+Профилирование запросов cProfile по требованию: для персонала по
+заголовку PROFILING['HEADER'] и для доли SAMPLE_RATE всех запросов.
+Результаты хранятся файлами pstats в каталоге по одному на вью,
+последние KEEP на вью; сводный профиль вью отдаётся для pstats,
+snakeviz или flameprof.
+"""
+import io
+import os
+import pstats
+import re
+import time
+import uuid
+from contextlib import suppress
+
+from django.conf import settings
+
+OPTIONS = {
+    'ENABLED': False,
+    'HEADER': 'X-Profile',
+    'SAMPLE_RATE': 0.0,
+    'DIRECTORY': 'profiles',
+    'KEEP': 100,
+    **getattr(settings, 'PROFILING', {}),
+}
+
+UNSAFE = re.compile(r'[^\w.-]+')
+
+
+def view_directory(view):
+    return os.path.join(OPTIONS['DIRECTORY'], UNSAFE.sub('_', view))
+
+
+def save(profile, view):
+    """Сохранение профиля запроса к вью; возвращает его идентификатор."""
+    directory = view_directory(view)
+    os.makedirs(directory, exist_ok=True)
+    name = f'{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}.prof'
+    profile.dump_stats(os.path.join(directory, name))
+    # Имена начинаются с отметки времени: сортировка хронологическая.
+    for old in sorted(os.listdir(directory))[:-OPTIONS['KEEP']]:
+        with suppress(FileNotFoundError):
+            os.remove(os.path.join(directory, old))
+    return f'{os.path.basename(directory)}/{name}'
+
+
+def summary():
+    """Вью, для которых есть профили, и число профилей."""
+    root = OPTIONS['DIRECTORY']
+    if not os.path.isdir(root):
+        return []
+    return [
+        {'view': view, 'profiles': len(os.listdir(os.path.join(root, view)))}
+        for view in sorted(os.listdir(root))
+    ]
+
+
+def aggregate(view):
+    """Сводная статистика всех сохранённых профилей вью или None."""
+    if UNSAFE.search(view):
+        return None
+    directory = view_directory(view)
+    if not os.path.isdir(directory):
+        return None
+    paths = [
+        os.path.join(directory, name)
+        for name in sorted(os.listdir(directory))
+    ]
+    if not paths:
+        return None
+    return pstats.Stats(*paths)
+
+
+def report(stats, limit):
+    """Текстовый отчёт: первые limit функций по накопленному времени."""
+    stream = io.StringIO()
+    stats.stream = stream
+    stats.sort_stats('cumulative').print_stats(limit)
+    return stream.getvalue()
@@ -0,0 +1,80 @@
+from django.contrib.auth import get_user_model
+from django.db.models import BooleanField, Exists, OuterRef, Prefetch, Value
+from recipes.models import Favourite, IngredientInRecipe, Recipe, ShoppingCart
+from users.models import Subscribe
+
+User = get_user_model()
+
+# Порядок ингредиентов в представлении рецепта: одинаковые названия
+# с разными единицами измерения различаются по ID.
+INGREDIENT_ORDERING = ('ingredient__name', 'ingredient_id')
+
+
+def flag(model, user, **lookup):
+    """Аннотация-флаг наличия строки model для пользователя."""
+    if not user.is_authenticated:
+        return Value(False, output_field=BooleanField())
+    return Exists(model.objects.filter(user=user, **lookup))
+
+
+def selected(items, fields):
+    """
+    Подгрузки и аннотации items (пары «поле ответа, значение») для
+    запрошенных полей ?fields=; fields=None — для всех полей.
+    """
+    return [value for name, value in items if fields is None or name in fields]
+
+
+def users_for_read(user, queryset=None, fields=None):
+    """Пользователи с флагом подписки subscribed."""
+    if queryset is None:
+        queryset = User.objects.all()
+    return queryset.annotate(**dict(selected((
+        ('is_subscribed', (
+            'subscribed', flag(Subscribe, user, author=OuterRef('pk')))),
+    ), fields)))
+
+
+def recipes_for_read(user, queryset=None, fields=None):
+    """
+    Рецепты для RecipeSerializer: авторы, теги и ингредиенты
+    подгружаются отдельными запросами на весь список, флаги
+    избранного и корзины считаются в основном запросе. С fields
+    подгружается и считается только нужное запрошенным полям.
+    """
+    if queryset is None:
+        queryset = Recipe.objects.all()
+    return queryset.prefetch_related(*selected((
+        ('author', Prefetch('author', queryset=users_for_read(user))),
+        ('tags', 'tags'),
+        ('ingredients', Prefetch(
+            'ingredient_list',
+            queryset=IngredientInRecipe.objects.select_related(
+                'ingredient').order_by(*INGREDIENT_ORDERING),
+        )),
+    ), fields)).annotate(**dict(selected((
+        ('is_favorited', (
+            'favorited', flag(Favourite, user, recipe=OuterRef('pk')))),
+        ('is_in_shopping_cart', (
+            'in_shopping_cart',
+            flag(ShoppingCart, user, recipe=OuterRef('pk')))),
+    ), fields)))
+
+
+def recipes_from_snapshots(user, queryset=None, fields=None):
+    """
+    Рецепты для RecipeSnapshotSerializer: одна таблица и флаги
+    (с fields — только флаги запрошенных полей).
+    """
+    if queryset is None:
+        queryset = Recipe.objects.all()
+    return queryset.only('id', 'snapshot').annotate(**dict(selected((
+        ('is_favorited', (
+            'favorited', flag(Favourite, user, recipe=OuterRef('pk')))),
+        ('is_in_shopping_cart', (
+            'in_shopping_cart',
+            flag(ShoppingCart, user, recipe=OuterRef('pk')))),
+        ('author', (
+            'author_subscribed',
+            flag(Subscribe, user, author=OuterRef('author')))),
+    ), fields)))
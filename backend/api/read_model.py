@@ -0,0 +1,81 @@
+"""
+Денормализованная read-модель рецептов: снимок не зависящего от
+пользователя представления RecipeSerializer в Recipe.snapshot.
+"""
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.db import close_old_connections, transaction
+from recipes.models import Recipe
+
+from .querysets import recipes_for_read
+from .serializers import recipe_snapshot
+
+BATCH_SIZE = 500
+
+
+def rebuild_snapshots(queryset=None, batch_size=BATCH_SIZE):
+    """
+    Пересборка снимков пачками; возвращает число пересобранных.
+    Строки пачки блокируются до записи: параллельная инвалидация ждёт
+    её и сбрасывает уже новый снимок, а рецепты, заблокированные
+    изменяющей их транзакцией, пропускаются до следующего прохода.
+    """
+    if queryset is None:
+        queryset = Recipe.objects.all()
+    ids = list(queryset.order_by('pk').values_list('pk', flat=True))
+    rebuilt = 0
+    for start in range(0, len(ids), batch_size):
+        with transaction.atomic():
+            locked = Recipe.objects.select_for_update(
+                skip_locked=True).filter(pk__in=ids[start:start + batch_size])
+            recipes = list(recipes_for_read(
+                AnonymousUser(),
+                Recipe.objects.filter(
+                    pk__in=list(locked.values_list('pk', flat=True))),
+            ))
+            for recipe in recipes:
+                recipe.snapshot = recipe_snapshot(recipe)
+            Recipe.objects.bulk_update(recipes, ('snapshot',))
+        rebuilt += len(recipes)
+    return rebuilt
+
+
+def invalidate_snapshots(queryset):
+    """
+    Сброс снимков затронутых рецептов одним UPDATE: до пересборки
+    они читаются обычным сериализатором. Пересобирает их фоновый
+    процесс rebuild_snapshots --watch, запрос на изменение не ждёт
+    пересборки тысяч рецептов популярного тега или ингредиента.
+    """
+    Recipe.objects.filter(
+        pk__in=queryset.values('pk'), snapshot__isnull=False,
+    ).update(snapshot=None)
+
+
+def watch_snapshots(interval=1.0, batch_size=BATCH_SIZE, report=None):
+    """Цикл пересборки сброшенных снимков по мере их появления."""
+    while True:
+        close_old_connections()
+        rebuilt = rebuild_snapshots(
+            Recipe.objects.filter(snapshot__isnull=True), batch_size)
+        if report is not None and rebuilt:
+            report(rebuilt)
+        if not rebuilt:
+            time.sleep(interval)
+
+
+def check_snapshots(queryset=None, batch_size=BATCH_SIZE):
+    """ID рецептов, чей снимок отсутствует или расходится с данными."""
+    if queryset is None:
+        queryset = Recipe.objects.all()
+    ids = list(queryset.order_by('pk').values_list('pk', flat=True))
+    mismatched = []
+    for start in range(0, len(ids), batch_size):
+        for recipe in recipes_for_read(
+            AnonymousUser(),
+            Recipe.objects.filter(pk__in=ids[start:start + batch_size]),
+        ):
+            if recipe.snapshot != recipe_snapshot(recipe):
+                mismatched.append(recipe.pk)
+    return mismatched
@@ -1,18 +1,62 @@
+from django.conf import settings
 from django.core.validators import MinValueValidator
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
 from django.db import transaction
-from django.db.models import Sum
 from djoser.serializers import UserSerializer, UserCreateSerializer
 from drf_extra_fields.fields import Base64ImageField, IntegerField
-from rest_framework import exceptions, serializers, validators
+from django.urls import reverse
+from rest_framework import exceptions, permissions, serializers, validators
 from recipes.models import (
     Ingredient, Tag, Recipe,
-    Favourite, IngredientInRecipe
+    Favourite, IngredientInRecipe, ExportJob
 )
 
+from .querysets import INGREDIENT_ORDERING, recipes_for_read
+
 User = get_user_model()
 
 
+def requested_fields(request, param='fields'):
+    """
+    Поля, перечисленные в ?fields=id,name,image запроса на чтение;
+    None — выборки полей нет.
+    """
+    if request is None or request.method not in permissions.SAFE_METHODS:
+        return None
+    value = request.GET.get(param)
+    if not value:
+        return None
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+class SparseFieldsMixin:
+    """
+    Выборочные поля ответа: ?fields=id,name,image. Применяется только
+    к сериализатору верхнего уровня при чтении, вложенные объекты
+    и запись не затрагиваются. Вью передают те же поля в querysets,
+    чтобы не подгружать данные для невыбранных полей.
+    """
+    fields_query_param = 'fields'
+
+    def get_fields(self):
+        fields = super().get_fields()
+        requested = self.requested_fields()
+        if requested:
+            for name in set(fields) - requested:
+                fields.pop(name)
+        return fields
+
+    def requested_fields(self):
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        if parent is not None:
+            return None
+        return requested_fields(
+            self.context.get('request'), self.fields_query_param)
+
+
 class IngredientSerializer(serializers.ModelSerializer):
     """Сериализатор для объекта класса Ingredient."""
 
@@ -61,7 +105,7 @@ class CustomUserCreateSerializer(UserCreateSerializer):
         return value
 
 
-class CustomUserSerializer(UserSerializer):
+class CustomUserSerializer(SparseFieldsMixin, UserSerializer):
     """Сериалайзер отображения инфо о пользователях."""
     is_subscribed = serializers.SerializerMethodField(read_only=True)
 
@@ -76,9 +120,25 @@ class CustomUserSerializer(UserSerializer):
         request = self.context.get('request')
         if not request or request.user.is_anonymous:
             return False
+        if hasattr(obj, 'subscribed'):
+            return obj.subscribed
         return obj.following.filter(user=request.user).exists()
 
 
+class UserProfileSerializer(CustomUserSerializer):
+    """
+    Профиль пользователя со счётчиками подписок. Используется только
+    эндпоинтами пользователей: во вложенного автора рецепта и в снимки
+    счётчики не попадают и не устаревают при каждой подписке.
+    """
+
+    class Meta(CustomUserSerializer.Meta):
+        fields = CustomUserSerializer.Meta.fields + (
+            'followers_count', 'following_count',
+        )
+        read_only_fields = ('followers_count', 'following_count')
+
+
 class SubscriptionSerializer(CustomUserSerializer):
     """Сериалайзер подписок на других аторов."""
 
@@ -118,7 +178,13 @@ class RecipeCreateIngredientsSerializer(serializers.ModelSerializer):
         fields = ('id', 'amount')
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+# Служебные поля рецепта: снимок read-модели, отметка фонового
+# удаления и дата изменения для синхронизации. В API не отдаются
+# и не принимаются.
+RECIPE_INTERNAL_FIELDS = ('snapshot', 'deleted_at', 'updated_at')
+
+
+class RecipeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Сериализатор для объекта класса Recipe."""
     tags = TagSerializer(many=True, read_only=True)
     author = CustomUserSerializer(read_only=True)
@@ -128,24 +194,34 @@ class RecipeSerializer(serializers.ModelSerializer):
     image = Base64ImageField()
 
     class Meta:
-        fields = '__all__'
+        exclude = RECIPE_INTERNAL_FIELDS
         read_only_fields = ('author',)
         model = Recipe
 
     def get_ingredients(self, obj):
         """Метод работы со списком ингридиентов."""
-        return obj.ingredients.values(
-            'id',
-            'name',
-            'measurement_unit',
-            amount=Sum('amount')
-        )
+        if 'ingredient_list' in getattr(obj, '_prefetched_objects_cache', {}):
+            items = obj.ingredient_list.all()
+        else:
+            items = obj.ingredient_list.select_related('ingredient').order_by(
+                *INGREDIENT_ORDERING)
+        return [
+            {
+                'id': item.ingredient.id,
+                'name': item.ingredient.name,
+                'measurement_unit': item.ingredient.measurement_unit,
+                'amount': item.amount,
+            }
+            for item in items
+        ]
 
     def get_is_favorited(self, obj):
         """Метод работы с избранным."""
         request = self.context.get('request')
         if not request or request.user.is_anonymous:
             return False
+        if hasattr(obj, 'favorited'):
+            return obj.favorited
         return obj.is_favorited(request.user)
 
     def get_is_in_shopping_cart(self, obj):
@@ -153,9 +229,90 @@ class RecipeSerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         if not request or request.user.is_anonymous:
             return False
+        if hasattr(obj, 'in_shopping_cart'):
+            return obj.in_shopping_cart
         return obj.is_in_shopping_cart(request.user)
 
 
+def recipes_without_snapshot(context, ids):
+    """Полные строки рецептов без снимка для RecipeSerializer."""
+    request = context.get('request')
+    user = request.user if request is not None else AnonymousUser()
+    return recipes_for_read(user, Recipe.objects.filter(pk__in=ids))
+
+
+class RecipeSnapshotListSerializer(serializers.ListSerializer):
+    """
+    Список рецептов из снимков: рецепты без снимка загружаются
+    для RecipeSerializer одним набором запросов на всю страницу.
+    """
+
+    def to_representation(self, data):
+        recipes = list(data)
+        missing = [recipe.pk for recipe in recipes if recipe.snapshot is None]
+        if missing:
+            loaded = {
+                recipe.pk: recipe
+                for recipe in recipes_without_snapshot(self.context, missing)
+            }
+            recipes = [loaded.get(recipe.pk, recipe) for recipe in recipes]
+        return [self.child.to_representation(recipe) for recipe in recipes]
+
+
+class RecipeSnapshotSerializer(SparseFieldsMixin, serializers.BaseSerializer):
+    """
+    Рецепт из денормализованного снимка: поверх сохранённого
+    представления RecipeSerializer подставляются флаги текущего
+    пользователя. Рецепты без снимка сериализуются обычным способом.
+    """
+
+    class Meta:
+        list_serializer_class = RecipeSnapshotListSerializer
+
+    def to_representation(self, instance):
+        if instance.snapshot is None:
+            if 'ingredient_list' not in getattr(
+                    instance, '_prefetched_objects_cache', {}):
+                instance = recipes_without_snapshot(
+                    self.context, [instance.pk]).get()
+            return RecipeSerializer(instance, context=self.context).data
+        data = dict(instance.snapshot)
+        data['author'] = dict(data['author'])
+        data['author']['is_subscribed'] = bool(
+            getattr(instance, 'author_subscribed', False))
+        data['is_favorited'] = bool(getattr(instance, 'favorited', False))
+        data['is_in_shopping_cart'] = bool(
+            getattr(instance, 'in_shopping_cart', False))
+        request = self.context.get('request')
+        if request is not None and data.get('image'):
+            data['image'] = request.build_absolute_uri(data['image'])
+        requested = self.requested_fields()
+        if requested:
+            data = {
+                name: value for name, value in data.items()
+                if name in requested
+            }
+        return data
+
+
+def recipe_snapshot(recipe):
+    """Не зависящее от пользователя представление рецепта."""
+    return RecipeSerializer(recipe).data
+
+
+def save_snapshot(recipe):
+    """
+    Пересборка снимка рецепта, если read-модель включена. Рецепт
+    перечитывается тем же запросом, что и в rebuild_snapshots, чтобы
+    снимок совпадал с проверкой check_snapshots.
+    """
+    if settings.RECIPE_READ_MODEL:
+        recipe = recipes_for_read(
+            AnonymousUser(), Recipe.objects.filter(pk=recipe.pk)).get()
+        Recipe.objects.filter(pk=recipe.pk).update(
+            snapshot=recipe_snapshot(recipe))
+
+
 class RecipeWriteSerializer(serializers.ModelSerializer):
     """Сериалайзер для создания и редактирования рецептов."""
     tags = serializers.PrimaryKeyRelatedField(
@@ -173,7 +330,7 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
     )
 
     class Meta:
-        fields = '__all__'
+        exclude = RECIPE_INTERNAL_FIELDS
         model = Recipe
 
     def validate_ingredients(self, value):
@@ -225,6 +382,7 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
         recipe = Recipe.objects.create(author=author, **validated_data)
         recipe.tags.set(tags)
         self.amounts_of_ingredients(recipe=recipe, ingredients=ingredients)
+        save_snapshot(recipe)
         return recipe
 
     @transaction.atomic
@@ -238,6 +396,7 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
         instance.ingredients.clear()
         self.amounts_of_ingredients(recipe=instance, ingredients=ingredients)
         instance.save()
+        save_snapshot(instance)
         return instance
 
     def to_representation(self, instance):
@@ -254,3 +413,25 @@ class FavouriteRecipeSerializer(serializers.ModelSerializer):
     class Meta:
         model = Favourite
         fields = ('recipe', 'user')
+
+
+class ExportJobSerializer(serializers.ModelSerializer):
+    """Сериализатор статуса фоновой выгрузки."""
+    download = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ExportJob
+        fields = (
+            'id', 'kind', 'status', 'error',
+            'created_at', 'finished_at', 'download',
+        )
+        read_only_fields = (
+            'status', 'error', 'created_at', 'finished_at',
+        )
+
+    def get_download(self, obj):
+        if obj.status != ExportJob.DONE:
+            return None
+        url = reverse('api:exports-download', args=(obj.pk,))
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
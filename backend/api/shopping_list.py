@@ -0,0 +1,32 @@
+from django.db.models import Sum
+from recipes.models import IngredientInRecipe
+
+
+def shopping_list_items(user, recipe_ids=None):
+    """
+    Суммы ингредиентов рецептов из корзины пользователя или только
+    рецептов recipe_ids, уже выбранных из неё.
+    """
+    if recipe_ids is None:
+        items = IngredientInRecipe.objects.filter(
+            recipe__shopping_cart__user=user)
+    else:
+        items = IngredientInRecipe.objects.filter(recipe_id__in=recipe_ids)
+    return items.filter(
+        recipe__deleted_at__isnull=True,
+    ).values(
+        'ingredient__name',
+        'ingredient__measurement_unit'
+    ).annotate(amount=Sum('amount'))
+
+
+def build_shopping_list(user, recipe_ids=None):
+    """Текст списка покупок: суммы ингредиентов рецептов из корзины."""
+    ingredients = shopping_list_items(user, recipe_ids)
+    return '\r\n'.join([
+        f'Список покупок для: {user.get_full_name()}\n\n'
+        f'- {ingredient["ingredient__name"]} '
+        f'({ingredient["ingredient__measurement_unit"]})'
+        f' - {ingredient["amount"]}'
+        for ingredient in ingredients
+    ])
@@ -0,0 +1,178 @@
+from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from recipes.models import Favourite, Ingredient, Recipe, ShoppingCart, Tag
+from rest_framework.authtoken.models import Token
+from users.models import Subscribe
+
+from .authentication import invalidate_token, invalidate_user, local_tokens
+from .coalescing import bump
+from .invalidation import publish, registry
+from .read_model import invalidate_snapshots
+
+User = get_user_model()
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    """
+    Выход пользователя (удаление токена djoser). Общий кэш очищается
+    сразу и повторно после фиксации транзакции, чтобы параллельный
+    запрос не вернул в него токен до удаления строки; LRU-кэши других
+    воркеров очищаются через шину инвалидации.
+    """
+    key = instance.key
+    invalidate_token(key)
+    transaction.on_commit(lambda: invalidate_token(key))
+    publish(instance)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_tokens(sender, instance, **kwargs):
+    """
+    Смена прав, деактивация или удаление пользователя: как и для
+    токена, общий кэш очищается сразу и после фиксации. Другие воркеры
+    получают событие через publish_change.
+    """
+    user_id = instance.pk
+    invalidate_user(user_id)
+    transaction.on_commit(lambda: invalidate_user(user_id))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_save, sender=Favourite)
+@receiver(post_delete, sender=Favourite)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_delete, sender=ShoppingCart)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=Subscribe)
+@receiver(post_delete, sender=Subscribe)
+def publish_change(sender, instance, **kwargs):
+    """
+    Событие для шины инвалидации локальных кэшей воркеров. Отправляется,
+    только если на модель подписан хотя бы один кэш (registry.register).
+    """
+    publish(instance)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def bump_recipes_version(sender, instance, **kwargs):
+    """Новая версия ленты рецептов, списков покупок и подписок."""
+    bump('recipes')
+
+
+@receiver(post_save, sender=Favourite)
+@receiver(post_delete, sender=Favourite)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_delete, sender=ShoppingCart)
+@receiver(post_save, sender=Subscribe)
+@receiver(post_delete, sender=Subscribe)
+def bump_user_version(sender, instance, **kwargs):
+    """Новая версия данных, зависящих от списков пользователя."""
+    name = {
+        Favourite: 'favorites',
+        ShoppingCart: 'cart',
+        Subscribe: 'subscriptions',
+    }[sender]
+    bump(f'{name}:{instance.user_id}')
+
+
+def touch_recipes(queryset):
+    """
+    Рецепты показывают теги, ингредиенты и автора: их изменение
+    сдвигает updated_at рецептов для /sync/ и сбрасывает снимки.
+    """
+    if settings.RECIPE_READ_MODEL:
+        invalidate_snapshots(queryset)
+    Recipe.all_objects.filter(pk__in=queryset.values('pk')).update(
+        updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Tag)
+@receiver(pre_delete, sender=Tag)
+def touch_tag_recipes(sender, instance, created=False, **kwargs):
+    """Переименование или удаление тега меняет его рецепты."""
+    if not created:
+        touch_recipes(Recipe.all_objects.filter(tags=instance))
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(pre_delete, sender=Ingredient)
+def touch_ingredient_recipes(sender, instance, created=False, **kwargs):
+    """Изменение ингредиента меняет рецепты с ним."""
+    if not created:
+        touch_recipes(Recipe.all_objects.filter(ingredients=instance))
+
+
+@receiver(post_save, sender=User)
+def touch_author_recipes(sender, instance, created=False,
+                         update_fields=None, **kwargs):
+    """Изменение профиля автора меняет его рецепты."""
+    if created:
+        return
+    if update_fields and set(update_fields) <= {
+            'last_login', 'password', 'is_active'}:
+        return
+    touch_recipes(Recipe.all_objects.filter(author=instance))
+
+
+def change_follow_counters(subscription, delta):
+    """
+    Атомарное изменение счётчиков подписок без чтения строк.
+    UPDATE минует post_save, поэтому изменение пользователей
+    публикуется в шину инвалидации явно.
+    """
+    User.objects.filter(pk=subscription.author_id).update(
+        followers_count=F('followers_count') + delta)
+    User.objects.filter(pk=subscription.user_id).update(
+        following_count=F('following_count') + delta)
+    publish(User(pk=subscription.author_id))
+    publish(User(pk=subscription.user_id))
+
+
+@receiver(post_save, sender=Subscribe)
+def count_subscription(sender, instance, created=False, raw=False,
+                       **kwargs):
+    """
+    Счётчики меняются вместе со строкой подписки: в subscribe,
+    в админке и в shell. bulk_create и команда run_deletion_worker
+    сигналы минуют: первый исправляет recount_follows, второй
+    уменьшает счётчики сам.
+    """
+    if created and not raw:
+        change_follow_counters(instance, 1)
+
+
+@receiver(post_delete, sender=Subscribe)
+def uncount_subscription(sender, instance, **kwargs):
+    """Удаление подписки, в том числе каскадом с пользователем."""
+    change_follow_counters(instance, -1)
+
+
+registry.register(
+    Token._meta.label,
+    local_tokens,
+    lambda cache, key: cache.delete(key),
+)
+registry.register(
+    User._meta.label,
+    local_tokens,
+    lambda cache, pk: cache.delete_where(
+        lambda key, flags: flags['id'] == pk),
+)
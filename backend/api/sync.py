@@ -0,0 +1,196 @@
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.http import base36_to_int, int_to_base36
+from rest_framework import exceptions
+from recipes.models import (Favourite, Ingredient, Recipe, ShoppingCart, Tag,
+                            Tombstone)
+
+from .querysets import recipes_for_read
+from .serializers import IngredientSerializer, RecipeSerializer, TagSerializer
+
+# Изменения моложе SYNC_LAG_SECONDS отдаются следующим запросом: так
+# транзакции, начатые до выдачи курсора, успевают зафиксироваться.
+SYNC_LAG = timedelta(seconds=getattr(settings, 'SYNC_LAG_SECONDS', 5))
+TOMBSTONE_RETENTION = timedelta(
+    days=getattr(settings, 'SYNC_TOMBSTONE_RETENTION_DAYS', 30))
+PAGE_SIZE = getattr(settings, 'SYNC_PAGE_SIZE', 500)
+
+# Потоки в порядке курсора. Строки потока и отметки об удалении его
+# объектов (Tombstone.model совпадает с именем потока) идут одной
+# последовательностью по позиции (момент, вид, ID): повторно
+# добавленный объект не окажется на странице раньше своего удаления.
+STREAMS = ('recipes', 'tags', 'ingredients', 'favorites', 'shopping_cart')
+USER_STREAMS = ('favorites', 'shopping_cart')
+ROW, TOMBSTONE = 0, 1
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+INVALID_CURSOR = {'since': 'Некорректный курсор.'}
+
+
+def encode_moment(moment):
+    return int_to_base36((moment - EPOCH) // MICROSECOND)
+
+
+def decode_moment(token):
+    return EPOCH + base36_to_int(token) * MICROSECOND
+
+
+def encode_position(position):
+    """
+    Позиция (момент, вид, ID) в base36. Без вида и ID — отданы все
+    изменения потока не позже момента.
+    """
+    moment, kind, pk = position
+    if kind is None:
+        return encode_moment(moment)
+    return f'{encode_moment(moment)}-{kind}-{int_to_base36(pk)}'
+
+
+def decode_position(token):
+    parts = token.split('-')
+    if len(parts) == 1:
+        return decode_moment(parts[0]), None, None
+    moment, kind, pk = parts
+    if kind not in (str(ROW), str(TOMBSTONE)):
+        raise ValueError(kind)
+    return decode_moment(moment), int(kind), base36_to_int(pk)
+
+
+def encode_cursor(issued, positions):
+    return '.'.join([
+        encode_moment(issued),
+        *(encode_position(positions[name]) for name in STREAMS),
+    ])
+
+
+def decode_cursor(token):
+    """Курсор since: момент выдачи и позиции потоков через точку."""
+    parts = token.split('.')
+    if len(parts) != len(STREAMS) + 1:
+        raise exceptions.ValidationError(INVALID_CURSOR)
+    try:
+        return decode_moment(parts[0]), {
+            name: decode_position(part)
+            for name, part in zip(STREAMS, parts[1:])
+        }
+    except (ValueError, OverflowError):
+        raise exceptions.ValidationError(INVALID_CURSOR)
+
+
+def after(field, kind, position):
+    """Условие «позже позиции» для строк вида kind."""
+    if position is None:
+        return Q()
+    moment, last_kind, pk = position
+    condition = Q(**{f'{field}__gt': moment})
+    if last_kind is None:
+        return condition
+    if kind > last_kind:
+        condition |= Q(**{field: moment})
+    elif kind == last_kind:
+        condition |= Q(**{field: moment, 'pk__gt': pk})
+    return condition
+
+
+def page(rows, tombstones, position, until):
+    """
+    До PAGE_SIZE изменений потока после позиции, не позже until:
+    строки и отметки об удалении вперемешку в порядке позиций.
+    Возвращает изменения, новую позицию и признак продолжения.
+    """
+    changes = []
+    for kind, queryset, field in (
+            (ROW, rows, 'updated_at'), (TOMBSTONE, tombstones, 'deleted_at')):
+        queryset = queryset.filter(
+            after(field, kind, position), **{f'{field}__lte': until})
+        changes.extend(
+            ((getattr(obj, field), kind, obj.pk), obj)
+            for obj in queryset.order_by(field, 'pk')[:PAGE_SIZE + 1]
+        )
+    changes.sort(key=lambda change: change[0])
+    if len(changes) > PAGE_SIZE:
+        changes = changes[:PAGE_SIZE]
+        return [obj for _, obj in changes], changes[-1][0], True
+    return [obj for _, obj in changes], (until, None, None), False
+
+
+def sources(user):
+    """Запросы строк потоков, доступных пользователю."""
+    # Рецепты в очереди на удаление (deleted_at) отдаются как удалённые.
+    querysets = {
+        'recipes': recipes_for_read(user, Recipe.all_objects.all()),
+        'tags': Tag.objects.all(),
+        'ingredients': Ingredient.objects.all(),
+    }
+    if user.is_authenticated:
+        for name, model in zip(USER_STREAMS, (Favourite, ShoppingCart)):
+            querysets[name] = model.objects.filter(user=user).only(
+                'id', 'recipe_id', 'updated_at')
+    return querysets
+
+
+def represent(name, rows, context):
+    if name == 'recipes':
+        return RecipeSerializer(rows, many=True, context=context).data
+    if name == 'tags':
+        return TagSerializer(rows, many=True).data
+    if name == 'ingredients':
+        return IngredientSerializer(rows, many=True).data
+    return [row.recipe_id for row in rows]
+
+
+def collect_changes(request):
+    """
+    Страница изменений с позиций курсора since: изменённые объекты
+    целиком, удалённые — списком ID. Каждый поток отдаёт не больше
+    PAGE_SIZE изменений; has_more означает, что следующую страницу
+    нужно запросить с новым курсором. Без курсора или с курсором,
+    выданным раньше срока хранения отметок об удалении, отдаётся
+    полный снимок, начиная с первой страницы.
+    """
+    now = timezone.now()
+    until = now - SYNC_LAG
+    token = request.query_params.get('since')
+    issued, positions = decode_cursor(token) if token else (None, None)
+    if issued is not None and issued < now - TOMBSTONE_RETENTION:
+        positions = None
+    full = positions is None
+    if full:
+        positions = dict.fromkeys(STREAMS)
+    user = request.user
+    querysets = sources(user)
+    tombstones = Tombstone.objects.only(
+        'id', 'model', 'object_id', 'deleted_at')
+    context = {'request': request}
+    data = {'full': full}
+    deleted = defaultdict(list)
+    has_more = False
+    for name in STREAMS:
+        if name not in querysets:
+            positions[name] = (until, None, None)
+            continue
+        owner = (
+            {'user_id': user.id} if name in USER_STREAMS
+            else {'user_id__isnull': True})
+        changes, positions[name], more = page(
+            querysets[name], tombstones.filter(model=name, **owner),
+            positions[name], until)
+        has_more = has_more or more
+        rows = []
+        for change in changes:
+            if isinstance(change, Tombstone):
+                deleted[name].append(change.object_id)
+            elif getattr(change, 'deleted_at', None) is not None:
+                deleted[name].append(change.pk)
+            else:
+                rows.append(change)
+        data[name] = represent(name, rows, context)
+    data['deleted'] = deleted
+    data['cursor'] = encode_cursor(until, positions)
+    data['has_more'] = has_more
+    return data
@@ -0,0 +1,19 @@
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase
+from foodgram.admin import unfiltered
+from recipes.models import Recipe
+
+User = get_user_model()
+
+
+class UnfilteredTests(SimpleTestCase):
+    """Когда пагинатор админки может взять оценку числа строк."""
+
+    def test_default_manager_condition_is_unfiltered(self):
+        self.assertTrue(unfiltered(Recipe.objects.all()))
+        self.assertTrue(unfiltered(User.objects.order_by('-id')))
+
+    def test_extra_conditions_are_filtered(self):
+        self.assertFalse(unfiltered(Recipe.objects.filter(name='Суп')))
+        self.assertFalse(unfiltered(Recipe.all_objects.all()))
+        self.assertFalse(unfiltered(User.objects.filter(is_staff=True)))
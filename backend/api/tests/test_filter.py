@@ -0,0 +1,41 @@
+from django.contrib.auth import get_user_model
+from recipes.models import Favourite, Recipe, ShoppingCart
+from rest_framework.test import APITestCase
+
+User = get_user_model()
+
+
+class RecipeFilterTests(APITestCase):
+    """Фильтры is_favorited и is_in_shopping_cart списка рецептов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='cook@example.com', username='cook', first_name='Иван',
+            last_name='Петров', password='secret')
+        cls.favorite, cls.in_cart, cls.other = (
+            Recipe.objects.create(
+                name=name, author=cls.user, image='recipes/soup.jpg',
+                text='Сварить.', cooking_time=30)
+            for name in ('Суп', 'Каша', 'Чай')
+        )
+        Favourite.objects.create(user=cls.user, recipe=cls.favorite)
+        ShoppingCart.objects.create(user=cls.user, recipe=cls.in_cart)
+
+    def ids(self, **params):
+        response = self.client.get('/api/recipes/', params)
+        self.assertEqual(response.status_code, 200)
+        return [recipe['id'] for recipe in response.data['results']]
+
+    def test_is_favorited(self):
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.ids(is_favorited=1), [self.favorite.pk])
+
+    def test_is_in_shopping_cart(self):
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.ids(is_in_shopping_cart=1), [self.in_cart.pk])
+
+    def test_anonymous_gets_full_list(self):
+        self.assertEqual(
+            sorted(self.ids(is_favorited=1, is_in_shopping_cart=1)),
+            sorted((self.favorite.pk, self.in_cart.pk, self.other.pk)))
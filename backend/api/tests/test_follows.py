@@ -0,0 +1,48 @@
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase
+from users.models import Subscribe
+
+User = get_user_model()
+
+
+class FollowCountersTests(APITestCase):
+    """Счётчики подписок при любом способе изменения подписки."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.author = (
+            User.objects.create_user(
+                email=f'{name}@example.com', username=name,
+                first_name='Иван', last_name='Петров', password='secret')
+            for name in ('reader', 'writer')
+        )
+
+    def counters(self):
+        self.user.refresh_from_db()
+        self.author.refresh_from_db()
+        return self.user.following_count, self.author.followers_count
+
+    def test_subscribe_view(self):
+        self.client.force_authenticate(self.user)
+        url = f'/api/users/{self.author.pk}/subscribe/'
+        # SubscriptionSerializer проверяет поля автора.
+        data = {'first_name': 'Иван', 'last_name': 'Петров'}
+        self.assertEqual(self.client.post(url, data).status_code, 201)
+        self.assertEqual(self.client.post(url, data).status_code, 400)
+        self.assertEqual(self.counters(), (1, 1))
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertEqual(self.client.delete(url).status_code, 404)
+        self.assertEqual(self.counters(), (0, 0))
+
+    def test_model_create_and_delete(self):
+        subscription = Subscribe.objects.create(
+            user=self.user, author=self.author)
+        self.assertEqual(self.counters(), (1, 1))
+        subscription.delete()
+        self.assertEqual(self.counters(), (0, 0))
+
+    def test_cascade_from_deleted_user(self):
+        Subscribe.objects.create(user=self.user, author=self.author)
+        self.user.delete()
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.followers_count, 0)
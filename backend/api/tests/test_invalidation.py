@@ -0,0 +1,89 @@
+from unittest import mock
+
+from api import invalidation
+from api.cache import LocalTTLCache
+from api.invalidation import MemoryBus, Registry, publish
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from recipes.models import Tag
+
+User = get_user_model()
+
+
+class RegistryTests(SimpleTestCase):
+    """Вытеснение записей локальных кэшей по событиям."""
+
+    def test_dispatch_evicts_object(self):
+        registry = Registry()
+        cache = LocalTTLCache()
+        cache.set(1, 'first')
+        cache.set(2, 'second')
+        registry.register('users.User', cache, lambda c, pk: c.delete(pk))
+        registry.dispatch({'model': 'users.user', 'pk': 1}, local=True)
+        self.assertIsNone(cache.get(1))
+        self.assertEqual(cache.get(2), 'second')
+
+    def test_dispatch_without_evict_clears_cache(self):
+        registry = Registry()
+        cache = LocalTTLCache()
+        cache.set(1, 'first')
+        registry.register('recipes.tag', cache)
+        registry.dispatch({'model': 'recipes.tag', 'pk': 5}, local=True)
+        self.assertIsNone(cache.get(1))
+
+    def test_handles(self):
+        registry = Registry()
+        registry.register('recipes.Tag', LocalTTLCache())
+        self.assertTrue(registry.handles('recipes.tag'))
+        self.assertFalse(registry.handles('recipes.favourite'))
+
+
+class PublishTests(TestCase):
+    """
+    Публикация через MemoryBus: второй реестр изображает другой воркер
+    и получает событие только после фиксации транзакции.
+    """
+
+    def setUp(self):
+        self.registry = Registry()
+        self.bus = MemoryBus()
+        self.worker = Registry()
+        self.bus.subscribe(self.worker.dispatch)
+        patcher = mock.patch.multiple(
+            invalidation, registry=self.registry, bus=self.bus)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.local = LocalTTLCache()
+        self.remote = LocalTTLCache()
+        for registry, cache in (
+                (self.registry, self.local), (self.worker, self.remote)):
+            registry.register(
+                User._meta.label, cache, lambda c, pk: c.delete(pk))
+            cache.set(7, 'cached')
+
+    def test_event_delivered_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            publish(User(pk=7))
+            self.assertEqual(self.local.get(7), 'cached')
+            self.assertEqual(self.remote.get(7), 'cached')
+        for callback in callbacks:
+            callback()
+        self.assertIsNone(self.local.get(7))
+        self.assertIsNone(self.remote.get(7))
+
+    def test_model_without_handlers_is_not_sent(self):
+        received = []
+        self.bus.subscribe(received.append)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            publish(Tag(pk=1))
+        self.assertEqual(callbacks, [])
+        self.assertEqual(received, [])
+
+    def test_other_workers_receive_pk(self):
+        received = []
+        self.bus.subscribe(received.append)
+        with self.captureOnCommitCallbacks(execute=True):
+            publish(User(pk=7))
+        self.assertEqual(len(received), 1)
+        self.assertEqual(received[0]['model'], 'users.user')
+        self.assertEqual(received[0]['pk'], 7)
@@ -0,0 +1,50 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from recipes.models import Recipe
+from rest_framework.test import APITestCase
+
+User = get_user_model()
+
+
+class SparseFieldsTests(APITestCase):
+    """?fields= сокращает не только ответ, но и запросы к БД."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='cook@example.com', username='cook', first_name='Иван',
+            last_name='Петров', password='secret')
+        Recipe.objects.create(
+            name='Суп', author=cls.user, image='recipes/soup.jpg',
+            text='Сварить.', cooking_time=30)
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def sql(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, ' '.join(query['sql'] for query in queries)
+
+    def test_recipes_skip_unrequested_relations(self):
+        response, sql = self.sql('/api/recipes/?fields=id,name')
+        self.assertEqual(set(response.data['results'][0]), {'id', 'name'})
+        for table in ('recipes_ingredientinrecipe', 'recipes_tag',
+                      'recipes_favourite', 'recipes_shoppingcart'):
+            self.assertNotIn(table, sql)
+
+    def test_recipes_load_requested_relations(self):
+        response, sql = self.sql('/api/recipes/?fields=id,tags,is_favorited')
+        self.assertEqual(
+            set(response.data['results'][0]), {'id', 'tags', 'is_favorited'})
+        self.assertIn('recipes_tag', sql)
+        self.assertIn('recipes_favourite', sql)
+        self.assertNotIn('recipes_ingredientinrecipe', sql)
+
+    def test_users_skip_subscription_flag(self):
+        response, sql = self.sql('/api/users/?fields=id,username')
+        self.assertEqual(
+            set(response.data['results'][0]), {'id', 'username'})
+        self.assertNotIn('users_subscribe', sql)
@@ -0,0 +1,76 @@
+from datetime import timedelta
+from unittest import mock
+
+from api import sync
+from api.deletion import schedule_recipe_deletion
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from recipes.models import Favourite, Recipe, Tombstone
+from rest_framework.test import APITestCase
+
+User = get_user_model()
+
+
+@mock.patch.object(sync, 'SYNC_LAG', timedelta(0))
+class SyncTests(APITestCase):
+    """Страницы /api/sync/ и изменения, которые в них попадают."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='cook@example.com', username='cook', first_name='Иван',
+            last_name='Петров', password='secret')
+        cls.recipe = Recipe.objects.create(
+            name='Суп', author=cls.user, image='recipes/soup.jpg',
+            text='Сварить.', cooking_time=30)
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def changes(self, cursor=None):
+        params = {'since': cursor} if cursor else {}
+        return self.client.get('/api/sync/', params).data
+
+    def test_readd_follows_older_tombstone(self):
+        hour_ago = timezone.now() - timedelta(hours=1)
+        Tombstone.objects.create(
+            model='favorites', object_id=self.recipe.pk, user_id=self.user.pk)
+        Tombstone.objects.update(deleted_at=hour_ago)
+        Favourite.objects.create(user=self.user, recipe=self.recipe)
+        events = []
+        cursor = None
+        with mock.patch.object(sync, 'PAGE_SIZE', 1):
+            while True:
+                data = self.changes(cursor)
+                events += [('deleted', pk) for pk in data['deleted'].get(
+                    'favorites', ())]
+                events += [('added', pk) for pk in data['favorites']]
+                cursor = data['cursor']
+                if not data['has_more']:
+                    break
+        self.assertEqual(
+            events,
+            [('deleted', self.recipe.pk), ('added', self.recipe.pk)])
+
+    def test_soft_deleted_recipe_is_reported(self):
+        cursor = self.changes()['cursor']
+        schedule_recipe_deletion(self.recipe)
+        data = self.changes(cursor)
+        self.assertEqual(data['recipes'], [])
+        self.assertEqual(data['deleted']['recipes'], [self.recipe.pk])
+
+    def test_author_change_touches_recipes(self):
+        cursor = self.changes()['cursor']
+        self.user.first_name = 'Пётр'
+        self.user.save()
+        data = self.changes(cursor)
+        self.assertEqual(
+            [recipe['id'] for recipe in data['recipes']], [self.recipe.pk])
+        self.assertEqual(data['recipes'][0]['author']['first_name'], 'Пётр')
+
+    def test_expired_cursor_returns_full_snapshot(self):
+        data = self.changes()
+        issued = timezone.now() - sync.TOMBSTONE_RETENTION - timedelta(days=1)
+        cursor = '.'.join(
+            [sync.encode_moment(issued), *data['cursor'].split('.')[1:]])
+        self.assertTrue(self.changes(cursor)['full'])
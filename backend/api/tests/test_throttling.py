@@ -0,0 +1,72 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from api import throttling
+from api.throttling import ActionScopedThrottle
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import SimpleTestCase
+
+DURATION = 60
+WINDOW = 1000
+
+
+class ActionScopedThrottleTests(SimpleTestCase):
+    """Скользящее окно по двум счётчикам: allow_request и wait()."""
+
+    def setUp(self):
+        patcher = mock.patch.object(throttling, 'SHARED', True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache = LocMemCache('throttle-tests', {})
+        self.addCleanup(self.cache.clear)
+        self.request = SimpleNamespace(
+            user=SimpleNamespace(is_authenticated=True, pk=1))
+        self.view = SimpleNamespace(
+            action='create', throttle_scopes={'create': 'test'})
+
+    def throttle(self, elapsed):
+        throttle = ActionScopedThrottle()
+        throttle.cache = self.cache
+        throttle.THROTTLE_RATES = {'test': '4/min'}
+        throttle.timer = lambda: WINDOW * DURATION + elapsed
+        return throttle
+
+    def requests(self, count, elapsed=0):
+        return [
+            self.throttle(elapsed).allow_request(self.request, self.view)
+            for _ in range(count)
+        ]
+
+    def set_previous(self, count):
+        self.cache.set(f'throttle:test:1:{WINDOW - 1}', count)
+
+    def test_action_without_scope_is_not_limited(self):
+        self.view.action = 'list'
+        self.assertEqual(self.requests(10), [True] * 10)
+
+    def test_limit_within_window(self):
+        self.assertEqual(self.requests(5), [True] * 4 + [False])
+
+    def test_previous_window_is_weighted(self):
+        self.set_previous(4)
+        # Прошла половина окна: предыдущее окно весит 2 запроса.
+        self.assertEqual(
+            self.requests(3, elapsed=30), [True, True, False])
+
+    def test_wait_for_next_window(self):
+        self.requests(4, elapsed=10)
+        throttle = self.throttle(10)
+        self.assertFalse(throttle.allow_request(self.request, self.view))
+        self.assertEqual(throttle.wait(), 50)
+
+    def test_wait_for_previous_window_to_decay(self):
+        self.set_previous(4)
+        self.cache.set(f'throttle:test:1:{WINDOW}', 2)
+        throttle = self.throttle(15)
+        self.assertFalse(throttle.allow_request(self.request, self.view))
+        # 4 * (1 - t / 60) + 2 < 4 при t > 30.
+        self.assertEqual(throttle.wait(), 15)
+
+    def test_not_limited_without_shared_cache(self):
+        with mock.patch.object(throttling, 'SHARED', False):
+            self.assertEqual(self.requests(10), [True] * 10)
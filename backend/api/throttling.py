@@ -0,0 +1,97 @@
+"""
+Ограничение частоты запросов скользящим окном по счётчикам в общем
+кэше Django. В отличие от SimpleRateThrottle, хранящего в кэше список
+отметок времени, на запрос приходится два-три обращения к кэшу
+с атомарным incr и данные O(1) на клиента.
+"""
+import logging
+import math
+
+from django.conf import settings
+from rest_framework.throttling import SimpleRateThrottle
+
+from .cache import process_local_cache
+
+logger = logging.getLogger(__name__)
+
+# Счётчики окон должны быть общими для воркеров: с кэшем в памяти
+# процесса каждый воркер считает свои запросы, и фактический лимит
+# в N раз выше заданного. Ограничение в этом случае отключается.
+SHARED = not process_local_cache()
+
+if not SHARED:
+    logger.warning(
+        'Ограничение частоты запросов отключено: кэш %s не общий для '
+        'процессов. Задайте CACHE_BACKEND (например, Redis).',
+        settings.CACHES['default']['BACKEND'],
+    )
+
+
+class ActionScopedThrottle(SimpleRateThrottle):
+    """
+    Лимит по области действия вьюсета: throttle_scopes сопоставляет
+    action с ключом DEFAULT_THROTTLE_RATES. Действия без области не
+    ограничиваются. Счёт ведётся по пользователю, для анонимных — по IP.
+    Без общего кэша (LocMemCache) запросы не ограничиваются.
+
+    Оценка числа запросов за последние duration секунд:
+    предыдущее окно * непрошедшая доля + текущее окно.
+    """
+    cache_format = 'throttle:%(scope)s:%(ident)s:%(window)d'
+
+    def __init__(self):
+        # Частота определяется областью действия в allow_request.
+        pass
+
+    def get_scope(self, view):
+        scopes = getattr(view, 'throttle_scopes', {})
+        return scopes.get(getattr(view, 'action', None))
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return request.user.pk
+        return self.get_ident(request)
+
+    def allow_request(self, request, view):
+        self.scope = self.get_scope(view)
+        if self.scope is None or not SHARED:
+            return True
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        ident = self.get_cache_key(request, view)
+        self.now = self.timer()
+        window = int(self.now // self.duration)
+        current, previous = (
+            self.cache_format % {
+                'scope': self.scope, 'ident': ident, 'window': number}
+            for number in (window, window - 1)
+        )
+        counts = self.cache.get_many((current, previous))
+        self.current = counts.get(current, 0)
+        self.previous = counts.get(previous, 0)
+        self.elapsed = self.now - window * self.duration
+        estimate = (
+            self.previous * (1 - self.elapsed / self.duration) + self.current)
+        if estimate >= self.num_requests:
+            return self.throttle_failure()
+        if not self.cache.add(current, 1, 2 * self.duration):
+            try:
+                self.cache.incr(current)
+            except ValueError:
+                self.cache.add(current, 1, 2 * self.duration)
+        return self.throttle_success()
+
+    def throttle_success(self):
+        return True
+
+    def wait(self):
+        """Секунды до момента, когда оценка опустится ниже лимита."""
+        duration, limit = self.duration, self.num_requests
+        if self.current >= limit:
+            # Ждать начала следующего окна и затухания текущего в нём.
+            return math.ceil(
+                duration - self.elapsed
+                + duration * (1 - limit / self.current))
+        return max(1, math.ceil(
+            duration * (1 - (limit - self.current) / self.previous)
+            - self.elapsed))
@@ -1,13 +1,16 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import IngredientViewSet, RecipeViewSet, TagViewSet
+from .views import (ExportJobViewSet, IngredientViewSet, ProfileDetailView,
+                    ProfileListView, RecipeViewSet, SyncView, TagViewSet)
 from users.views import CustomUserViewSet
 
 app_name = 'api'
 
 router = DefaultRouter()
 
+router.register('exports', ExportJobViewSet, basename='exports')
 router.register('ingredients', IngredientViewSet, basename='ingredients')
 router.register('recipes', RecipeViewSet, basename='recipes')
 router.register('tags', TagViewSet, basename='tags')
@@ -15,5 +18,24 @@ router.register('users', CustomUserViewSet)
 
 urlpatterns = [
     path('auth/', include('djoser.urls.authtoken')),
+    path('sync/', SyncView.as_view(), name='sync'),
+    path('profiles/', ProfileListView.as_view(), name='profiles'),
+    path(
+        'profiles/<str:view>/',
+        ProfileDetailView.as_view(),
+        name='profile-detail',
+    ),
     path('', include(router.urls)),
 ]
+
+if settings.ASYNC_READ_VIEWS:
+    from . import async_views
+
+    urlpatterns = [
+        path('recipes/', async_views.recipe_list),
+        path('recipes/<int:pk>/', async_views.recipe_detail),
+        path('ingredients/', async_views.ingredient_list),
+        path('ingredients/<int:pk>/', async_views.ingredient_detail),
+        path('tags/', async_views.tag_list),
+        path('tags/<int:pk>/', async_views.tag_detail),
+    ] + urlpatterns
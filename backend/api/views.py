@@ -1,38 +1,93 @@
-from django.db.models import Sum
-from django.http.response import HttpResponse
+import marshal
+
+from django.conf import settings
+from django.db import transaction
+from django.http.response import FileResponse, HttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import filters, status, viewsets
+from rest_framework import filters, mixins, status, viewsets
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
-from recipes.models import Recipe, Ingredient, Tag, IngredientInRecipe
+from rest_framework.views import APIView
+from recipes.models import Recipe, Ingredient, Tag, ExportJob
 
+from . import profiling
+from .coalescing import coalesce, versions
+from .deletion import schedule_recipe_deletion
+from .exports import enqueue
 from .filter import RecipeFilter
+from .mixins import BatchListMixin
 from .pagination import LimitPageNumberPagination
 from .permissions import IsAuthorOrAdminPermission, IsAdminOrReadOnly
 from .serializers import (
     RecipeSerializer, RecipeWriteSerializer, IngredientSerializer,
-    TagSerializer, FavouriteRecipeSerializer
+    TagSerializer, FavouriteRecipeSerializer, RecipeSnapshotSerializer,
+    ExportJobSerializer, requested_fields
 )
+from .querysets import recipes_for_read, recipes_from_snapshots
+from .shopping_list import build_shopping_list
+from .sync import collect_changes
 from recipes.models import Favourite, ShoppingCart
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(BatchListMixin, viewsets.ModelViewSet):
     """Вьюсет для работы с моделями рецептов."""
     queryset = Recipe.objects.all()
     permission_classes = (IsAuthorOrAdminPermission,)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
     pagination_class = LimitPageNumberPagination
+    throttle_scopes = {
+        'create': 'recipe_writes',
+        'update': 'recipe_writes',
+        'partial_update': 'recipe_writes',
+        'favorite': 'favorites',
+        'shopping_cart': 'shopping_cart',
+        'download_shopping_cart': 'exports',
+        'checkout_shopping_cart': 'exports',
+    }
+
+    def get_queryset(self):
+        if self.action in ('list', 'retrieve'):
+            fields = requested_fields(self.request)
+            if settings.RECIPE_READ_MODEL:
+                return recipes_from_snapshots(
+                    self.request.user, fields=fields)
+            return recipes_for_read(self.request.user, fields=fields)
+        return super().get_queryset()
+
+    def list(self, request, *args, **kwargs):
+        """Лента рецептов с защитой от лавины одинаковых запросов."""
+        user = request.user
+        names = ['recipes']
+        if user.is_authenticated:
+            names += [
+                f'favorites:{user.pk}',
+                f'cart:{user.pk}',
+                f'subscriptions:{user.pk}',
+            ]
+        key = (
+            f'recipes:list:{user.pk or 0}:{versions(*names)}:'
+            f'{request.get_full_path()}'
+        )
+        data = coalesce(key, lambda: super(RecipeViewSet, self).list(
+            request, *args, **kwargs).data)
+        return Response(data)
 
     def perform_create(self, serializer):
         """Функция создания нового рецепта."""
         serializer.save(author=self.request.user,)
 
+    def perform_destroy(self, instance):
+        """Рецепт скрывается сразу, удаляется в фоне."""
+        schedule_recipe_deletion(instance)
+
     def get_serializer_class(self):
         if self.action in ('create', 'partial_update'):
             return RecipeWriteSerializer
+        if settings.RECIPE_READ_MODEL and self.action in ('list', 'retrieve'):
+            return RecipeSnapshotSerializer
         return RecipeSerializer
 
     @action(
@@ -42,7 +97,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
     )
     def favorite(self, request, pk):
         """Добавление, удаление рецепта из избранного."""
-        return self.add_delete_method(Favourite, request.user, pk)
+        return self.add_delete_method(request, pk, Favourite)
 
     @action(
         detail=True,
@@ -51,7 +106,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
     )
     def shopping_cart(self, request, pk):
         """Добавление, удаление рецепта из списка покупок."""
-        return self.add_delete_method(ShoppingCart, request.user, pk)
+        return self.add_delete_method(request, pk, ShoppingCart)
 
     def add_delete_method(self, request, pk, model):
         """Метод добавления, удаления рецепта."""
@@ -87,20 +142,37 @@ class RecipeViewSet(viewsets.ModelViewSet):
         if not user.shopping_cart.exists():
             return Response(status=status.HTTP_400_BAD_REQUEST)
 
-        ingredients = IngredientInRecipe.objects.filter(
-            recipe__shopping_cart__user=request.user
-        ).values(
-            'ingredient__name',
-            'ingredient__measurement_unit'
-        ).annotate(amount=Sum('amount'))
-        shopping_list = '\r\n'.join([
-            f'Список покупок для: {user.get_full_name()}\n\n'
-            f'- {ingredient["ingredient__name"]} '
-            f'({ingredient["ingredient__measurement_unit"]})'
-            f' - {ingredient["amount"]}'
-            for ingredient in ingredients
-        ])
+        key = (
+            f'shopping-list:{user.pk}:'
+            f'{versions("recipes", f"cart:{user.pk}")}'
+        )
+        shopping_list = coalesce(key, lambda: build_shopping_list(user))
+        return self.shopping_list_response(shopping_list)
+
+    @action(
+        detail=False,
+        methods=['post'],
+        permission_classes=[IsAuthenticated]
+    )
+    def checkout_shopping_cart(self, request):
+        """
+        Список покупок с очисткой корзины. Список строится из БД без
+        кэша по заблокированным строкам корзины, и удаляются только
+        они: рецепты, добавленные во время запроса, остаются.
+        """
+        user = request.user
+        with transaction.atomic():
+            items = dict(
+                ShoppingCart.objects.select_for_update().filter(
+                    user=user).values_list('pk', 'recipe_id'))
+            if not items:
+                return Response(status=status.HTTP_400_BAD_REQUEST)
+            shopping_list = build_shopping_list(user, list(items.values()))
+            ShoppingCart.objects.filter(user=user, pk__in=items).delete()
+        return self.shopping_list_response(shopping_list)
 
+    @staticmethod
+    def shopping_list_response(shopping_list):
         response = HttpResponse(shopping_list, content_type='text/plain')
         response['Content-Disposition'] = (
             'attachment; filename="shopping_list.txt"')
@@ -121,3 +193,102 @@ class TagViewSet(viewsets.ModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = (IsAdminOrReadOnly,)
+
+
+class ExportJobViewSet(mixins.CreateModelMixin,
+                       mixins.RetrieveModelMixin,
+                       viewsets.GenericViewSet):
+    """
+    Фоновые выгрузки: POST ставит задание в очередь (или возвращает
+    готовое по тем же данным), GET показывает статус, download отдаёт
+    готовый файл.
+    """
+    serializer_class = ExportJobSerializer
+    permission_classes = (IsAuthenticated,)
+    throttle_scopes = {'create': 'exports'}
+
+    def get_queryset(self):
+        return ExportJob.objects.filter(user=self.request.user)
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        kind = serializer.validated_data.get('kind', ExportJob.SHOPPING_LIST)
+        if (
+            kind == ExportJob.SHOPPING_LIST
+            and not request.user.shopping_cart.exists()
+        ):
+            return Response(
+                {'errors': 'Корзина покупок пуста.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        job = enqueue(request.user, kind)
+        return Response(
+            self.get_serializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True)
+    def download(self, request, pk):
+        """Скачивание готового файла выгрузки."""
+        job = self.get_object()
+        if job.status != ExportJob.DONE:
+            return Response(
+                {'errors': 'Выгрузка ещё не готова.'},
+                status=status.HTTP_409_CONFLICT
+            )
+        extension = job.file.name.rsplit('.', 1)[-1]
+        return FileResponse(
+            job.file.open('rb'),
+            as_attachment=True,
+            filename=f'{job.kind}.{extension}',
+        )
+
+
+class SyncView(APIView):
+    """
+    Инкрементальная синхронизация: изменения рецептов, тегов,
+    ингредиентов, избранного и корзины с момента курсора since.
+    Удаления из deleted применяются клиентом до изменённых объектов.
+    """
+    permission_classes = (AllowAny,)
+
+    def get(self, request):
+        return Response(collect_changes(request))
+
+
+class ProfileListView(APIView):
+    """Вью, для которых сохранены профили запросов."""
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        return Response(profiling.summary())
+
+
+class ProfileDetailView(APIView):
+    """
+    Сводный профиль вью: файл pstats или, с ?top=N, текстовый отчёт
+    по N самым дорогим функциям.
+    """
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request, view):
+        stats = profiling.aggregate(view)
+        if stats is None:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        top = request.query_params.get('top')
+        if top is not None:
+            try:
+                limit = int(top)
+            except ValueError:
+                return Response(
+                    {'errors': 'top должен быть целым числом.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            return HttpResponse(
+                profiling.report(stats, limit), content_type='text/plain')
+        response = HttpResponse(
+            marshal.dumps(stats.stats),
+            content_type='application/octet-stream'
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{view}.prof"')
+        return response
@@ -0,0 +1 @@
+"""Сценарии нагрузочного тестирования и бенчмарки API Foodgram."""
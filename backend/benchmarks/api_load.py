@@ -0,0 +1,184 @@
+"""
+Нагрузочный сценарий для API Foodgram.
+
+Перед запуском база наполняется командой
+``python manage.py generate_data``, затем:
+
+    python -m benchmarks.api_load --base-url http://localhost:8000 \\
+        --duration 60 --concurrency 16 --output results.json
+
+Для сравнения с прошлым прогоном передаётся ``--compare old.json``.
+"""
+import argparse
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from .stats import compare, save_results, summarize
+
+# (имя, вес, метод, шаблон пути, нужна ли авторизация)
+SCENARIOS = (
+    ('recipes-list', 30, 'GET', '/api/recipes/?page={page}', False),
+    ('recipes-by-tag', 10, 'GET', '/api/recipes/?tags={tag}', False),
+    ('recipes-detail', 20, 'GET', '/api/recipes/{recipe}/', False),
+    ('recipes-favorited', 5, 'GET',
+     '/api/recipes/?is_favorited=1', True),
+    ('recipes-in-cart', 3, 'GET',
+     '/api/recipes/?is_in_shopping_cart=1', True),
+    ('ingredients-search', 10, 'GET',
+     '/api/ingredients/?name={ingredient}', False),
+    ('tags-list', 5, 'GET', '/api/tags/', False),
+    ('users-detail', 5, 'GET', '/api/users/{user}/', False),
+    ('users-me', 3, 'GET', '/api/users/me/', True),
+    ('subscriptions', 3, 'GET',
+     '/api/users/subscriptions/?recipes_limit=3', True),
+    ('favorite-toggle', 3, 'FAVORITE', '/api/recipes/{recipe}/favorite/',
+     True),
+    ('cart-toggle', 2, 'FAVORITE', '/api/recipes/{recipe}/shopping_cart/',
+     True),
+    ('download-shopping-cart', 1, 'GET',
+     '/api/recipes/download_shopping_cart/', True),
+)
+
+INGREDIENT_PREFIXES = ('а', 'б', 'в', 'к', 'м', 'с', 'сы', 'мо', 'ка')
+
+
+class Fixture:
+    """Идентификаторы реальных объектов для подстановки в пути."""
+
+    def __init__(self, base_url, session):
+        recipes = session.get(
+            f'{base_url}/api/recipes/?limit=100').json()
+        self.recipes = [item['id'] for item in recipes.get('results', [])]
+        self.pages = max(1, recipes.get('count', 0) // 6)
+        self.tags = [
+            item['slug'] for item in session.get(
+                f'{base_url}/api/tags/').json()]
+        self.users = sorted({
+            item['author']['id'] for item in recipes.get('results', [])})
+        if not self.recipes:
+            raise SystemExit(
+                'В базе нет рецептов: запустите manage.py generate_data.')
+
+    def fill(self, template, rng):
+        return template.format(
+            page=rng.randint(1, min(self.pages, 50)),
+            tag=rng.choice(self.tags) if self.tags else '',
+            recipe=rng.choice(self.recipes),
+            user=rng.choice(self.users),
+            ingredient=rng.choice(INGREDIENT_PREFIXES),
+        )
+
+
+def login(base_url, email, password):
+    response = requests.post(
+        f'{base_url}/api/auth/token/login/',
+        json={'email': email, 'password': password},
+    )
+    response.raise_for_status()
+    return response.json()['auth_token']
+
+
+def worker(number, args, fixture, tokens, deadline, results, lock):
+    rng = random.Random(args.seed + number)
+    session = requests.Session()
+    token = tokens[number % len(tokens)] if tokens else None
+    scenarios = [item for item in SCENARIOS if token or not item[4]]
+    weights = [item[1] for item in scenarios]
+    local = defaultdict(list)
+    errors = defaultdict(int)
+    while time.monotonic() < deadline:
+        name, _, method, template, auth = rng.choices(
+            scenarios, weights)[0]
+        url = args.base_url + fixture.fill(template, rng)
+        headers = {'Authorization': f'Token {token}'} if auth else {}
+        start = time.perf_counter()
+        if method == 'FAVORITE':
+            response = session.post(url, headers=headers)
+            if response.status_code == 400:
+                response = session.delete(url, headers=headers)
+        else:
+            response = session.request(method, url, headers=headers)
+        local[name].append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            errors[name] += 1
+    with lock:
+        for name, latencies in local.items():
+            results['latencies'][name].extend(latencies)
+            results['errors'][name] += errors[name]
+
+
+def run(args):
+    session = requests.Session()
+    fixture = Fixture(args.base_url, session)
+    tokens = [
+        login(args.base_url, f'bench{number}@example.com', args.password)
+        for number in range(args.users)
+    ]
+    results = {
+        'latencies': defaultdict(list),
+        'errors': defaultdict(int),
+    }
+    lock = threading.Lock()
+    start = time.monotonic()
+    deadline = start + args.duration
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        futures = [
+            executor.submit(
+                worker, number, args, fixture, tokens, deadline,
+                results, lock)
+            for number in range(args.concurrency)
+        ]
+        for future in futures:
+            future.result()
+    duration = time.monotonic() - start
+    summary = {
+        name: summarize(latencies, results['errors'][name], duration)
+        for name, latencies in results['latencies'].items()
+    }
+    summary['total'] = summarize(
+        [value for latencies in results['latencies'].values()
+         for value in latencies],
+        sum(results['errors'].values()),
+        duration,
+    )
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--base-url', default='http://localhost:8000')
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument(
+        '--users', type=int, default=4,
+        help='Сколько пользователей из generate_data авторизовать.')
+    parser.add_argument('--password', default='benchmark-password')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='api_load.json')
+    parser.add_argument('--compare')
+    args = parser.parse_args()
+    args.base_url = args.base_url.rstrip('/')
+
+    summary = run(args)
+    for name, row in sorted(summary.items()):
+        print(
+            f'{name:<24} {row["requests"]:>7} req '
+            f'{row.get("rps", 0):>8} rps  p50 {row["p50_ms"]:>8} ms  '
+            f'p95 {row["p95_ms"]:>8} ms  p99 {row["p99_ms"]:>8} ms  '
+            f'errors {row["errors"]}')
+    save_results(
+        args.output, 'api_load', summary,
+        base_url=args.base_url, duration=args.duration,
+        concurrency=args.concurrency, users=args.users,
+    )
+    if args.compare:
+        print('\n'.join(compare(args.compare, summary)))
+
+
+if __name__ == '__main__':
+    main()
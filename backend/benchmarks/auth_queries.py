@@ -0,0 +1,79 @@
+"""
+Число запросов к БД на ленте рецептов при обычной и кэширующей
+токен-аутентификации.
+
+    python manage.py generate_data
+    python -m benchmarks.auth_queries --requests 100
+"""
+import argparse
+import os
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+django.setup()
+
+from api.authentication import CachedTokenAuthentication  # noqa: E402
+from api.views import RecipeViewSet  # noqa: E402
+from django.conf import settings  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from rest_framework.authentication import TokenAuthentication  # noqa: E402
+from rest_framework.authtoken.models import Token  # noqa: E402
+
+from .stats import save_results, summarize  # noqa: E402
+
+User = get_user_model()
+
+AUTHENTICATION = {
+    'token': TokenAuthentication,
+    'cached-token': CachedTokenAuthentication,
+}
+
+
+def measure(authentication, token, path, count):
+    RecipeViewSet.authentication_classes = (authentication,)
+    client = Client(HTTP_AUTHORIZATION=f'Token {token.key}')
+    client.get(path)
+    queries = []
+    latencies = []
+    for _ in range(count):
+        with CaptureQueriesContext(connection) as context:
+            start = time.perf_counter()
+            response = client.get(path)
+            latencies.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.status_code
+        queries.append(len(context.captured_queries))
+    row = summarize(latencies)
+    row['queries_per_request'] = sum(queries) / len(queries)
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--path', default='/api/recipes/')
+    parser.add_argument('--output', default='auth_queries.json')
+    args = parser.parse_args()
+
+    settings.ALLOWED_HOSTS = ['*']
+    user = User.objects.filter(username__startswith='bench').first()
+    if user is None:
+        raise SystemExit('Нет пользователей: запустите generate_data.')
+    token, _ = Token.objects.get_or_create(user=user)
+    results = {
+        name: measure(authentication, token, args.path, args.requests)
+        for name, authentication in AUTHENTICATION.items()
+    }
+    for name, row in results.items():
+        print(
+            f'{name:<14} {row["queries_per_request"]:.1f} queries/request  '
+            f'p50 {row["p50_ms"]} ms')
+    save_results(args.output, 'auth_queries', results, path=args.path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""
+Удаление автора с большим числом рецептов и избранного: каскад Django
+против фонового удаления пачками (api.deletion).
+
+    python -m benchmarks.bulk_delete --recipes 10000 --favorites 1000000
+
+Для каждого способа данные создаются заново. Сравниваются общее время,
+пик памяти Python и самая долгая транзакция (время удержания
+блокировок).
+"""
+import argparse
+import os
+import time
+import tracemalloc
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+django.setup()
+
+from api.deletion import Deleter, schedule_user_deletion  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from recipes.models import DeletionJob, Favourite, Recipe  # noqa: E402
+
+from .stats import save_results  # noqa: E402
+
+User = get_user_model()
+
+PREFIX = 'bulkdelete'
+
+
+def seed(recipes, favorites, batch_size):
+    User.objects.filter(username__startswith=PREFIX).delete()
+    users_needed = -(-favorites // recipes)
+    User.objects.bulk_create(
+        User(
+            username=f'{PREFIX}{number}',
+            email=f'{PREFIX}{number}@example.com',
+            first_name='Удаление',
+            last_name=str(number),
+        ) for number in range(users_needed + 1)
+    )
+    users = list(User.objects.filter(
+        username__startswith=PREFIX).order_by('pk'))
+    author, fans = users[0], users[1:]
+    Recipe.objects.bulk_create(
+        (Recipe(
+            author=author,
+            name=f'Рецепт {number}',
+            image='recipes/bench.png',
+            text='Описание.',
+            cooking_time=10,
+        ) for number in range(recipes)),
+        batch_size=batch_size,
+    )
+    recipe_ids = list(Recipe.objects.filter(
+        author=author).values_list('pk', flat=True))
+    Favourite.objects.bulk_create(
+        (Favourite(
+            user_id=fans[number // recipes].pk,
+            recipe_id=recipe_ids[number % recipes],
+        ) for number in range(favorites)),
+        batch_size=batch_size,
+    )
+    return author
+
+
+def cascade(author, batch_size):
+    start = time.perf_counter()
+    author.delete()
+    duration = time.perf_counter() - start
+    return {'longest_transaction_s': round(duration, 3)}
+
+
+def pipeline(author, batch_size):
+    longest = 0
+    last = time.perf_counter()
+
+    def report(job):
+        nonlocal longest, last
+        now = time.perf_counter()
+        longest = max(longest, now - last)
+        last = now
+
+    job = schedule_user_deletion(author)
+    Deleter(job, batch_size, report).run()
+    job.refresh_from_db()
+    DeletionJob.objects.filter(pk=job.pk).delete()
+    return {
+        'longest_transaction_s': round(longest, 3),
+        'progress': job.progress,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--recipes', type=int, default=10000)
+    parser.add_argument('--favorites', type=int, default=1000000)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--output', default='bulk_delete.json')
+    args = parser.parse_args()
+
+    results = {}
+    for name, strategy in (('cascade', cascade), ('pipeline', pipeline)):
+        author = seed(args.recipes, args.favorites, 10000)
+        tracemalloc.start()
+        start = time.perf_counter()
+        row = strategy(author, args.batch_size)
+        row['total_s'] = round(time.perf_counter() - start, 3)
+        row['peak_memory_mb'] = round(
+            tracemalloc.get_traced_memory()[1] / 2 ** 20, 1)
+        tracemalloc.stop()
+        results[name] = row
+        print(
+            f'{name:<9} total {row["total_s"]} s  '
+            f'longest transaction {row["longest_transaction_s"]} s  '
+            f'peak {row["peak_memory_mb"]} MB')
+    User.objects.filter(username__startswith=PREFIX).delete()
+    save_results(args.output, 'bulk_delete', results,
+                 recipes=args.recipes, favorites=args.favorites,
+                 batch_size=args.batch_size)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Задержка доставки событий шины инвалидации между процессами.
+
+Слушатель с отдельным реестром запускается в этом же процессе и
+получает события, опубликованные через NOTIFY:
+
+    python -m benchmarks.invalidation_latency --events 1000
+"""
+import argparse
+import os
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+django.setup()
+
+from api.cache import LocalTTLCache  # noqa: E402
+from api.invalidation import PostgresBus, Registry  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+from .stats import save_results, summarize  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--events', type=int, default=1000)
+    parser.add_argument('--interval', type=float, default=0.001)
+    parser.add_argument('--output', default='invalidation_latency.json')
+    args = parser.parse_args()
+
+    channel = settings.CACHE_INVALIDATION.get('CHANNEL', 'cache_invalidation')
+    bus = PostgresBus(channel)
+    registry = Registry()
+    cache = LocalTTLCache()
+    registry.register('recipes.tag', cache)
+    bus.start(registry)
+    time.sleep(1)
+    for number in range(args.events):
+        bus.send({
+            'model': 'recipes.tag',
+            'pk': number,
+            'origin': 'benchmark',
+            'sent': time.time(),
+        })
+        time.sleep(args.interval)
+    deadline = time.monotonic() + 10
+    while len(registry.latencies) < args.events and (
+            time.monotonic() < deadline):
+        time.sleep(0.05)
+    bus.stop()
+    results = {'propagation': summarize(list(registry.latencies))}
+    results['propagation']['lost'] = args.events - len(registry.latencies)
+    row = results['propagation']
+    print(
+        f'delivered {row["requests"]}/{args.events}  '
+        f'p50 {row["p50_ms"]} ms  p99 {row["p99_ms"]} ms')
+    save_results(args.output, 'invalidation_latency', results,
+                 events=args.events, interval=args.interval)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+Задержка поиска по избранному и корзине пользователя до и после
+секционирования таблиц по user_id.
+
+    python manage.py generate_data --users 1000 --recipes 10000
+    python -m benchmarks.partitioned_lookup --seed-rows 10000000 \\
+        --output before.json
+    python manage.py partition_user_tables
+    python -m benchmarks.partitioned_lookup --compare before.json
+"""
+import argparse
+import os
+import random
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+django.setup()
+
+from api.querysets import recipes_for_read  # noqa: E402
+from api.shopping_list import shopping_list_items  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import connection  # noqa: E402
+from recipes.models import Favourite, Recipe, ShoppingCart  # noqa: E402
+
+from .stats import compare, save_results, summarize  # noqa: E402
+
+User = get_user_model()
+
+
+def seed(model, rows, users_per_batch=100):
+    """Дополнение таблицы парами (пользователь, рецепт) до rows строк."""
+    table = connection.ops.quote_name(model._meta.db_table)
+    recipe_table = connection.ops.quote_name(Recipe._meta.db_table)
+    user_ids = list(User.objects.order_by('pk').values_list('pk', flat=True))
+    recipes = Recipe.objects.count()
+    if len(user_ids) * recipes < rows:
+        raise SystemExit(
+            f'Нужно пользователей * рецептов >= {rows}: '
+            f'запустите generate_data с большими --users и --recipes.')
+    per_user = -(-rows // len(user_ids))
+    for start in range(0, len(user_ids), users_per_batch):
+        batch = user_ids[start:start + users_per_batch]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {table} (user_id, recipe_id, updated_at) '
+                f'SELECT u.id, r.id, now() - random() * interval \'180 days\' '
+                f'FROM unnest(%s::bigint[]) AS u(id) CROSS JOIN ('
+                f'SELECT id FROM {recipe_table} ORDER BY id LIMIT %s) r '
+                f'ON CONFLICT DO NOTHING',
+                [batch, per_user])
+    return model.objects.count()
+
+
+def measure(queries, users, count):
+    results = {}
+    for name, query in queries.items():
+        latencies = []
+        for _ in range(count):
+            user = random.choice(users)
+            start = time.perf_counter()
+            query(user)
+            latencies.append(time.perf_counter() - start)
+        results[name] = summarize(latencies)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--seed-rows', type=int, default=0)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--compare')
+    parser.add_argument('--output', default='partitioned_lookup.json')
+    args = parser.parse_args()
+
+    if args.seed_rows:
+        for model in (Favourite, ShoppingCart):
+            total = seed(model, args.seed_rows)
+            print(f'{model._meta.db_table}: {total} строк')
+    users = list(User.objects.all()[:1000])
+    recipe_ids = list(Recipe.objects.values_list('pk', flat=True)[:1000])
+    queries = {
+        'favorite.exists': lambda user: Favourite.objects.filter(
+            user=user, recipe_id=random.choice(recipe_ids)).exists(),
+        'recipes.is_favorited': lambda user: list(
+            recipes_for_read(user).filter(favorites__user=user)[:6]),
+        'recipes.is_in_shopping_cart': lambda user: list(
+            recipes_for_read(user).filter(shopping_cart__user=user)[:6]),
+        'download_shopping_cart': lambda user: list(
+            shopping_list_items(user)),
+    }
+    results = measure(queries, users, args.requests)
+    for name, row in results.items():
+        print(f'{name:<28} p50 {row["p50_ms"]} ms  p99 {row["p99_ms"]} ms')
+    if args.compare:
+        print('\n'.join(compare(args.compare, results)))
+    save_results(
+        args.output, 'partitioned_lookup', results,
+        favourites=Favourite.objects.count(),
+        carts=ShoppingCart.objects.count(),
+    )
+
+
+if __name__ == '__main__':
+    main()
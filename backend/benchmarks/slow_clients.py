@@ -0,0 +1,127 @@
+"""
+Поведение сервера под нагрузкой медленных клиентов.
+
+Медленные клиенты по байту отправляют заголовки запроса и тело
+(имитация загрузки изображения), пока быстрые клиенты измеряют
+задержку чтения рецептов. Сравнение WSGI и ASGI развёртываний:
+
+    gunicorn foodgram.wsgi:application --bind 0:8000
+    gunicorn foodgram.asgi:application -k uvicorn.workers.UvicornWorker \\
+        --bind 0:8001
+    python -m benchmarks.slow_clients \\
+        --target wsgi=http://localhost:8000 \\
+        --target asgi=http://localhost:8001 --slow 32
+"""
+import argparse
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+
+from .stats import save_results, summarize
+
+SLOW_BODY_SIZE = 64 * 1024
+
+
+def slow_client(base_url, interval, stop):
+    """Запрос, который передаётся на сервер по одному байту."""
+    parts = urlsplit(base_url)
+    body = b'{"image": "' + b'A' * SLOW_BODY_SIZE + b'"}'
+    request = (
+        f'POST /api/recipes/ HTTP/1.1\r\n'
+        f'Host: {parts.hostname}\r\n'
+        f'Content-Type: application/json\r\n'
+        f'Content-Length: {len(body)}\r\n\r\n'
+    ).encode() + body
+    while not stop.is_set():
+        try:
+            with socket.create_connection(
+                    (parts.hostname, parts.port or 80), timeout=30) as sock:
+                for offset in range(len(request)):
+                    if stop.is_set():
+                        return
+                    sock.sendall(request[offset:offset + 1])
+                    time.sleep(interval)
+        except OSError:
+            time.sleep(interval)
+
+
+def fast_client(base_url, deadline, timeout):
+    session = requests.Session()
+    latencies = []
+    errors = 0
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        try:
+            response = session.get(
+                f'{base_url}/api/recipes/', timeout=timeout)
+            if response.status_code >= 400:
+                errors += 1
+        except requests.RequestException:
+            errors += 1
+        latencies.append(time.perf_counter() - start)
+    return latencies, errors
+
+
+def measure(base_url, args):
+    stop = threading.Event()
+    slow_threads = [
+        threading.Thread(
+            target=slow_client, args=(base_url, args.interval, stop),
+            daemon=True)
+        for _ in range(args.slow)
+    ]
+    for thread in slow_threads:
+        thread.start()
+    time.sleep(args.warmup)
+    start = time.monotonic()
+    deadline = start + args.duration
+    with ThreadPoolExecutor(max_workers=args.fast) as executor:
+        futures = [
+            executor.submit(fast_client, base_url, deadline, args.timeout)
+            for _ in range(args.fast)
+        ]
+        outcomes = [future.result() for future in futures]
+    duration = time.monotonic() - start
+    stop.set()
+    latencies = [value for result, _ in outcomes for value in result]
+    errors = sum(count for _, count in outcomes)
+    return summarize(latencies, errors, duration)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        '--target', action='append', required=True,
+        help='Имя и адрес развёртывания в виде name=url.')
+    parser.add_argument('--slow', type=int, default=32)
+    parser.add_argument('--fast', type=int, default=4)
+    parser.add_argument(
+        '--interval', type=float, default=0.05,
+        help='Пауза между байтами медленного клиента, с.')
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--warmup', type=float, default=2)
+    parser.add_argument('--timeout', type=float, default=10)
+    parser.add_argument('--output', default='slow_clients.json')
+    args = parser.parse_args()
+
+    results = {}
+    for target in args.target:
+        name, url = target.split('=', 1)
+        results[name] = measure(url.rstrip('/'), args)
+        row = results[name]
+        print(
+            f'{name:<8} {row["rps"]:>8} rps  p50 {row["p50_ms"]:>8} ms  '
+            f'p99 {row["p99_ms"]:>8} ms  errors {row["errors"]}')
+    save_results(
+        args.output, 'slow_clients', results,
+        slow=args.slow, fast=args.fast, interval=args.interval,
+        duration=args.duration,
+    )
+
+
+if __name__ == '__main__':
+    main()
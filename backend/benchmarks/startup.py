@@ -0,0 +1,129 @@
+"""
+Время импорта Django-проекта и время до первого ответа gunicorn.
+
+Сравнение полного профиля и профиля API_ONLY:
+
+    python -m benchmarks.startup --profile full --profile api
+"""
+import argparse
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+
+import requests
+
+from .stats import save_results
+
+PROFILES = {
+    'full': {'API_ONLY': 'False'},
+    'api': {'API_ONLY': 'True'},
+}
+
+IMPORT_SNIPPET = (
+    'import time; start = time.perf_counter(); '
+    'import django; django.setup(); '
+    'import foodgram.urls; from foodgram.wsgi import application; '
+    'print(time.perf_counter() - start)'
+)
+
+
+def profile_env(profile):
+    env = dict(os.environ)
+    env.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+    env.update(PROFILES[profile])
+    return env
+
+
+def import_time(profile, repeat):
+    """Медиана времени импорта и django.setup() в свежем процессе."""
+    samples = [
+        float(subprocess.check_output(
+            (sys.executable, '-c', IMPORT_SNIPPET),
+            env=profile_env(profile),
+        ))
+        for _ in range(repeat)
+    ]
+    return round(statistics.median(samples) * 1000, 2)
+
+
+def slowest_imports(profile, limit):
+    """Самые тяжёлые модули по данным python -X importtime."""
+    completed = subprocess.run(
+        (sys.executable, '-X', 'importtime', '-c', IMPORT_SNIPPET),
+        env=profile_env(profile), capture_output=True, text=True,
+    )
+    rows = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        rows.append((int(cumulative), name.strip()))
+    return [
+        {'module': name, 'cumulative_ms': round(value / 1000, 2)}
+        for value, name in sorted(rows, reverse=True)[:limit]
+    ]
+
+
+def first_request(profile, args):
+    """Время от запуска gunicorn до первого успешного ответа API."""
+    env = profile_env(profile)
+    env['GUNICORN_BIND'] = f'127.0.0.1:{args.port}'
+    env['GUNICORN_WORKERS'] = str(args.workers)
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        ('gunicorn', 'foodgram.wsgi:application', '-c', 'gunicorn.conf.py'),
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < args.timeout:
+            try:
+                response = requests.get(
+                    f'http://127.0.0.1:{args.port}/api/tags/', timeout=1)
+                if response.status_code < 500:
+                    return round((time.perf_counter() - start) * 1000, 2)
+            except requests.RequestException:
+                pass
+            time.sleep(0.01)
+        return None
+    finally:
+        process.send_signal(signal.SIGTERM)
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        '--profile', action='append', choices=PROFILES)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--timeout', type=float, default=60)
+    parser.add_argument(
+        '--skip-server', action='store_true',
+        help='Не измерять время до первого ответа (нужна БД).')
+    parser.add_argument('--output', default='startup.json')
+    args = parser.parse_args()
+
+    results = {}
+    for profile in args.profile or list(PROFILES):
+        row = {
+            'import_ms': import_time(profile, args.repeat),
+            'slowest_imports': slowest_imports(profile, 10),
+        }
+        if not args.skip_server:
+            row['first_request_ms'] = first_request(profile, args)
+        results[profile] = row
+        print(
+            f'{profile:<6} import {row["import_ms"]} ms  '
+            f'first request {row.get("first_request_ms")} ms')
+    save_results(
+        args.output, 'startup', results,
+        repeat=args.repeat, workers=args.workers,
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+import json
+import platform
+import subprocess
+import time
+from datetime import datetime, timezone
+
+
+def percentile(values, percent):
+    """Перцентиль по методу ближайшего ранга."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1,
+                      int(round(percent / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+def summarize(latencies, errors=0, duration=None):
+    """Сводка по списку задержек в секундах: пропускная способность
+    и p50/p95/p99 в миллисекундах."""
+    count = len(latencies)
+    summary = {
+        'requests': count,
+        'errors': errors,
+        'mean_ms': round(sum(latencies) / count * 1000, 3) if count else 0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'max_ms': round(max(latencies) * 1000, 3) if count else 0,
+    }
+    if duration:
+        summary['rps'] = round(count / duration, 2)
+    return summary
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ('git', 'rev-parse', '--short', 'HEAD'),
+            stderr=subprocess.DEVNULL,
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_results(path, name, results, **meta):
+    """Сохранение результатов бенчмарка в JSON вместе с метаданными."""
+    payload = {
+        'benchmark': name,
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'created': datetime.now(timezone.utc).isoformat(),
+        'timestamp': time.time(),
+        'meta': meta,
+        'results': results,
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    return payload
+
+
+def compare(baseline_path, results, metric='p95_ms'):
+    """Строки сравнения текущих результатов с сохранённым прогоном."""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+    lines = []
+    for name, current in sorted(results.items()):
+        previous = baseline.get(name)
+        if not previous or not previous.get(metric):
+            lines.append(f'{name}: {current.get(metric)} (нет базы)')
+            continue
+        delta = (current[metric] - previous[metric]) / previous[metric]
+        lines.append(
+            f'{name}: {previous[metric]} -> {current[metric]} '
+            f'({delta:+.1%})')
+    return lines
@@ -0,0 +1,80 @@
+"""
+Накладные расходы ограничения частоты на один запрос: счётчики
+скользящего окна против списка отметок ScopedRateThrottle из DRF.
+
+    python -m benchmarks.throttle_overhead --requests 10000
+    CACHE_BACKEND=django.core.cache.backends.memcached.PyMemcacheCache \\
+        CACHE_LOCATION=127.0.0.1:11211 python -m benchmarks.throttle_overhead
+"""
+import argparse
+import os
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+django.setup()
+
+from api.throttling import ActionScopedThrottle  # noqa: E402
+from django.contrib.auth.models import AnonymousUser  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from rest_framework.request import Request  # noqa: E402
+from rest_framework.test import APIRequestFactory  # noqa: E402
+from rest_framework.throttling import ScopedRateThrottle  # noqa: E402
+
+from .stats import save_results, summarize  # noqa: E402
+
+RATES = {'bench': '1000000/min'}
+
+
+class View:
+    action = 'bench'
+    throttle_scope = 'bench'
+    throttle_scopes = {'bench': 'bench'}
+
+
+def measure(throttle_class, count, clients):
+    throttle_class.THROTTLE_RATES = RATES
+    factory = APIRequestFactory()
+    requests = []
+    for number in range(clients):
+        address = f'10.0.{number // 250}.{number % 250}'
+        request = Request(factory.post(
+            '/api/recipes/1/favorite/', REMOTE_ADDR=address))
+        request.user = AnonymousUser()
+        requests.append(request)
+    view = View()
+    latencies = []
+    for index in range(count):
+        request = requests[index % clients]
+        start = time.perf_counter()
+        throttle = throttle_class()
+        allowed = throttle.allow_request(request, view)
+        latencies.append(time.perf_counter() - start)
+        assert allowed
+    return summarize(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=10000)
+    parser.add_argument('--clients', type=int, default=10)
+    parser.add_argument('--output', default='throttle_overhead.json')
+    args = parser.parse_args()
+
+    results = {}
+    for name, throttle_class in (
+            ('sliding-window', ActionScopedThrottle),
+            ('drf-scoped', ScopedRateThrottle)):
+        cache.clear()
+        results[name] = measure(throttle_class, args.requests, args.clients)
+        row = results[name]
+        print(
+            f'{name:<15} p50 {row["p50_ms"]} ms  p99 {row["p99_ms"]} ms  '
+            f'max {row["max_ms"]} ms')
+    save_results(args.output, 'throttle_overhead', results,
+                 requests=args.requests, clients=args.clients)
+
+
+if __name__ == '__main__':
+    main()
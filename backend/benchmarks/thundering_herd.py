@@ -0,0 +1,93 @@
+"""
+Число запросов к БД при лавине одновременных запросов на холодный кэш.
+
+Все потоки одновременно запрашивают одну страницу после сброса кэша;
+сравниваются прогоны с объединением запросов и без него:
+
+    python -m benchmarks.thundering_herd --threads 64 \\
+        --path /api/recipes/?page=1
+"""
+import argparse
+import os
+import threading
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+django.setup()
+
+from api import coalescing  # noqa: E402
+from django.conf import settings  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from django.db import connection, connections  # noqa: E402
+from django.test import Client  # noqa: E402
+
+from .stats import save_results, summarize  # noqa: E402
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        with self.lock:
+            self.count += 1
+        return execute(sql, params, many, context)
+
+
+def herd(path, threads, headers):
+    counter = QueryCounter()
+    barrier = threading.Barrier(threads)
+    latencies = []
+    errors = []
+
+    def worker():
+        client = Client(**headers)
+        with connection.execute_wrapper(counter):
+            barrier.wait()
+            start = time.perf_counter()
+            response = client.get(path)
+            latencies.append(time.perf_counter() - start)
+        if response.status_code != 200:
+            errors.append(response.status_code)
+        connections.close_all()
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    row = summarize(latencies, len(errors))
+    row['queries'] = counter.count
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--path', default='/api/recipes/?page=1')
+    parser.add_argument('--token', help='Токен для авторизованных путей.')
+    parser.add_argument('--output', default='thundering_herd.json')
+    args = parser.parse_args()
+
+    settings.ALLOWED_HOSTS = ['*']
+    headers = {}
+    if args.token:
+        headers['HTTP_AUTHORIZATION'] = f'Token {args.token}'
+    results = {}
+    for name, enabled in (('direct', False), ('coalesced', True)):
+        coalescing.OPTIONS['ENABLED'] = enabled
+        cache.clear()
+        results[name] = herd(args.path, args.threads, headers)
+        row = results[name]
+        print(
+            f'{name:<10} {row["queries"]:>6} queries  '
+            f'p50 {row["p50_ms"]} ms  p99 {row["p99_ms"]} ms')
+    save_results(args.output, 'thundering_herd', results,
+                 path=args.path, threads=args.threads)
+
+
+if __name__ == '__main__':
+    main()
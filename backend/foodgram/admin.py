@@ -0,0 +1,110 @@
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils.functional import cached_property
+
+ESTIMATE_THRESHOLD = 100000
+
+
+def unfiltered(queryset):
+    """
+    Запрос не сужает менеджер модели по умолчанию: у Recipe.objects
+    уже есть условие deleted_at IS NULL, поэтому пустой WHERE для
+    списка рецептов не годится.
+    """
+    default = queryset.model._default_manager.all()
+    return queryset.query.where == default.query.where
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Пагинатор админки, который для нефильтрованных больших таблиц
+    PostgreSQL берёт оценку числа строк из pg_class вместо COUNT(*).
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql' and unfiltered(queryset):
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT reltuples::bigint FROM pg_class '
+                    'WHERE relname = %s',
+                    (queryset.model._meta.db_table,),
+                )
+                row = cursor.fetchone()
+            if row and row[0] > ESTIMATE_THRESHOLD:
+                return row[0]
+        return super().count
+
+
+def related_count(model, field):
+    """
+    Коррелированный подзапрос COUNT(*) для аннотации списка: в отличие
+    от Count() через JOIN и GROUP BY считается только для строк страницы.
+    """
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef('pk')})
+            .order_by().values(field).annotate(total=Count('*'))
+            .values('total'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+class PrefixSearchMixin:
+    """
+    Поиск в админке по началу строки без учёта регистра
+    (UPPER(field) LIKE 'X%'). Для каждого поля из search_fields модель
+    объявляет индекс по Upper(field) с правилом сортировки "C", иначе
+    такой LIKE читает всю таблицу.
+    """
+
+    def get_search_results(self, request, queryset, search_term):
+        search_term = search_term.strip()
+        search_fields = self.get_search_fields(request)
+        if not search_term or not search_fields:
+            return queryset, False
+        condition = Q()
+        for field in search_fields:
+            lookup = f'{field.lstrip("^")}__istartswith'
+            condition |= Q(**{lookup: search_term})
+        return queryset.filter(condition), False
+
+
+class ScalableAdmin(PrefixSearchMixin):
+    """Общие настройки списков для таблиц с большим числом строк."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class BackgroundDeletionMixin:
+    """
+    Удаление из админки через очередь DeletionJob: объект сразу
+    скрывается, зависимые строки удаляет run_deletion_worker. Страница
+    подтверждения не собирает каскад связанных объектов в памяти.
+    Наследник реализует schedule_deletion(obj).
+    """
+
+    def schedule_deletion(self, obj):
+        raise NotImplementedError
+
+    def get_deleted_objects(self, objs, request):
+        objs = list(objs)
+        return (
+            [str(obj) for obj in objs],
+            {self.model._meta.verbose_name_plural: len(objs)},
+            set(),
+            [],
+        )
+
+    def delete_model(self, request, obj):
+        self.schedule_deletion(obj)
+
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            self.schedule_deletion(obj)
@@ -31,6 +31,10 @@ DEBUG = False
 
 ALLOWED_HOSTS = ['*']
 
+# Облегчённый профиль для узлов, обслуживающих только /api/: без админки,
+# сессий, сообщений и статики, что ускоряет загрузку воркеров.
+API_ONLY = os.getenv('API_ONLY', default='False') == 'True'
+
 
 # Application definition
 
@@ -50,16 +54,39 @@ INSTALLED_APPS = [
     'api.apps.ApiConfig',
 ]
 
+if API_ONLY:
+    INSTALLED_APPS = [
+        app for app in INSTALLED_APPS if app not in (
+            'django.contrib.admin',
+            'django.contrib.sessions',
+            'django.contrib.messages',
+            'django.contrib.staticfiles',
+        )
+    ]
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'django.middleware.gzip.GZipMiddleware',
+    'api.middleware.BrotliMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.middleware.ProfilingMiddleware',
 ]
 
+if API_ONLY:
+    # Токен-аутентификация DRF не использует сессии и CSRF.
+    MIDDLEWARE = [
+        'django.middleware.security.SecurityMiddleware',
+        'django.middleware.gzip.GZipMiddleware',
+        'api.middleware.BrotliMiddleware',
+        'django.middleware.common.CommonMiddleware',
+        'api.middleware.ProfilingMiddleware',
+    ]
+
 ROOT_URLCONF = 'foodgram.urls'
 
 TEMPLATES = [
@@ -80,6 +107,12 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'foodgram.wsgi.application'
 
+ASGI_APPLICATION = 'foodgram.asgi.application'
+
+# Асинхронные обработчики чтения для рецептов, ингредиентов и тегов.
+# Включаются автоматически при запуске через foodgram.asgi.
+ASYNC_READ_VIEWS = os.getenv('ASYNC_READ_VIEWS', default='False') == 'True'
+
 
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
@@ -103,6 +136,16 @@ DATABASES = {
 }'''
 
 
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', default=''),
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
 
@@ -150,17 +193,92 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.AllowAny',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
     ],
+    # Области задаются во вьюсетах атрибутом throttle_scopes, счётчики
+    # хранятся в кэше default.
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api.throttling.ActionScopedThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'favorites': '60/min',
+        'shopping_cart': '60/min',
+        'subscriptions': '30/min',
+        'recipe_writes': '20/min',
+        'exports': '10/min',
+    },
+}
+
+# Шина инвалидации локальных кэшей воркеров: 'postgres' (LISTEN/NOTIFY)
+# или 'memory'. По умолчанию выбирается по движку БД.
+CACHE_INVALIDATION = {
+    'BACKEND': os.getenv('CACHE_INVALIDATION_BACKEND'),
+    'CHANNEL': 'cache_invalidation',
+}
+
+# Защита дорогих эндпоинтов от лавины запросов: срок свежести TTL и
+# окно STALE_TTL, в котором устаревший ответ отдаётся во время пересчёта.
+# С LocMemCache работает только объединение внутри процесса.
+COALESCING = {
+    'ENABLED': os.getenv('COALESCING_ENABLED', default='True') == 'True',
+    'TTL': 10,
+    'STALE_TTL': 60,
+    'LOCK_TIMEOUT': 30,
 }
 
+# Время жизни токена в общем кэше и в LRU-кэше процесса, секунды.
+# Локальные кэши других воркеров очищаются через шину инвалидации,
+# короткий TTL страхует от потерянных событий.
+TOKEN_CACHE_TTL = 300
+TOKEN_LOCAL_CACHE_TTL = 5
+TOKEN_LOCAL_CACHE_SIZE = 4096
+
+if API_ONLY:
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] = [
+        'api.renderers.FastJSONRenderer',
+    ]
+
+# Профилирование запросов: персонал присылает заголовок HEADER, кроме
+# того профилируется доля SAMPLE_RATE всех запросов. Выключенное
+# профилирование не добавляет middleware в цепочку.
+PROFILING = {
+    'ENABLED': os.getenv('PROFILING_ENABLED', default='False') == 'True',
+    'HEADER': 'X-Profile',
+    'SAMPLE_RATE': float(os.getenv('PROFILING_SAMPLE_RATE', default='0')),
+    'DIRECTORY': os.path.join(BASE_DIR, 'profiles'),
+    'KEEP': 100,
+}
+
+# Инкрементальная синхронизация /api/sync/.
+SYNC_LAG_SECONDS = 5
+SYNC_TOMBSTONE_RETENTION_DAYS = 30
+SYNC_PAGE_SIZE = 500
+
+# Рейтинги рецептов (команда compute_rankings): добавление в корзину
+# весит больше избранного, вклад действия убывает вдвое за
+# HALF_LIFE_HOURS.
+TRENDING = {
+    'HALF_LIFE_HOURS': 48,
+    'WINDOW_DAYS': 14,
+    'FAVORITE_WEIGHT': 1,
+    'CART_WEIGHT': 2,
+}
+
+# Чтение рецептов из денормализованного снимка Recipe.snapshot.
+# После включения снимки строятся командой rebuild_snapshots.
+RECIPE_READ_MODEL = os.getenv('RECIPE_READ_MODEL', default='False') == 'True'
+
 DJOSER = {
     'LOGIN_FIELD': 'email',
     'HIDE_USERS': False,
     'SERIALIZERS': {
         'user_create': 'api.serializers.CustomUserCreateSerializer',
-        'user': 'api.serializers.CustomUserSerializer',
-        'current_user': 'api.serializers.CustomUserSerializer',
+        'user': 'api.serializers.UserProfileSerializer',
+        'current_user': 'api.serializers.UserProfileSerializer',
     },
 }
 
@@ -15,15 +15,17 @@ Including another URLconf
 """
 from django.conf import settings
 from django.conf.urls.static import static
-from django.contrib import admin
 from django.urls import include, path
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
     path('api/', include('api.urls', namespace='api')),
-
 ]
 
+if not settings.API_ONLY:
+    from django.contrib import admin
+
+    urlpatterns += [path('admin/', admin.site.urls)]
+
 if settings.DEBUG:
     urlpatterns += static(
         settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
@@ -0,0 +1,72 @@
+"""
+Конфигурация gunicorn для продакшена.
+
+Параметры переопределяются переменными окружения GUNICORN_*:
+    GUNICORN_WORKERS      число воркеров (по умолчанию 2 * CPU + 1, но не
+                          больше, чем позволяет GUNICORN_DB_CONNECTIONS)
+    GUNICORN_WORKER_CLASS sync, gthread или uvicorn.workers.UvicornWorker
+    GUNICORN_THREADS      число потоков воркера gthread
+    GUNICORN_PRELOAD      загрузка Django в мастер-процессе до fork
+    GUNICORN_DB_CONNECTIONS  сколько соединений с БД могут занять воркеры
+"""
+import os
+import sys
+
+
+def env_int(name, default):
+    return int(os.getenv(name, default))
+
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+threads = env_int('GUNICORN_THREADS', 4)
+
+# CPU, доступные процессу (cgroup/taskset), а не все CPU хоста. Каждый
+# поток воркера держит своё соединение с БД, ещё одно — слушатель шины
+# инвалидации; воркеров не больше, чем умещается в бюджет соединений
+# (max_connections PostgreSQL по умолчанию 100, часть нужна cron и
+# фоновым командам).
+cpus = len(os.sched_getaffinity(0))
+connections_per_worker = (threads if worker_class == 'gthread' else 1) + 1
+workers = env_int('GUNICORN_WORKERS', max(1, min(
+    cpus * 2 + 1,
+    env_int('GUNICORN_DB_CONNECTIONS', 40) // connections_per_worker,
+)))
+
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True') == 'True'
+
+# Периодический перезапуск воркеров против утечек памяти; разброс
+# не даёт всем воркерам перезапуститься одновременно.
+max_requests = env_int('GUNICORN_MAX_REQUESTS', 2000)
+max_requests_jitter = env_int('GUNICORN_MAX_REQUESTS_JITTER', 200)
+
+timeout = env_int('GUNICORN_TIMEOUT', 30)
+graceful_timeout = env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+keepalive = env_int('GUNICORN_KEEPALIVE', 5)
+
+accesslog = os.getenv('GUNICORN_ACCESSLOG', '-')
+errorlog = '-'
+
+
+def close_connections():
+    """Соединения с БД, открытые в мастере, нельзя делить между
+    процессами после fork."""
+    if 'django.db' not in sys.modules:
+        return
+    from django.db import connections
+    connections.close_all()
+
+
+def pre_fork(server, worker):
+    close_connections()
+
+
+def post_fork(server, worker):
+    close_connections()
+
+
+def post_worker_init(worker):
+    """Слушатель шины инвалидации кэшей в каждом воркере."""
+    from api.invalidation import start_listener
+    start_listener()
@@ -1,33 +1,68 @@
+from api.deletion import schedule_recipe_deletion
+from api.read_model import invalidate_snapshots
+from django.conf import settings
 from django.contrib import admin
 from django.contrib.admin import display
+from foodgram.admin import (BackgroundDeletionMixin, ScalableAdmin,
+                            related_count)
 
-from .models import (Favourite, Ingredient, IngredientInRecipe, Recipe,
-                     ShoppingCart, Tag)
+from .models import (DeletionJob, Favourite, Ingredient, IngredientInRecipe,
+                     Recipe, ShoppingCart, Tag)
 
 
 class IngredientInline(admin.TabularInline):
     """Отображение модели IngredientInRecipe."""
     model = IngredientInRecipe
     min_num = 1
+    extra = 0
+    autocomplete_fields = ('ingredient',)
 
 
 @admin.register(Recipe)
-class RecipeAdmin(admin.ModelAdmin):
+class RecipeAdmin(BackgroundDeletionMixin, ScalableAdmin, admin.ModelAdmin):
     """Отображение модели Recipe."""
     inlines = (IngredientInline,)
     list_display = ('name', 'author', 'cooking_time',
                     'id', 'count_favorite', 'pub_date',)
+    list_select_related = ('author',)
+    list_filter = ('tags',)
+    search_fields = ('name',)
+    autocomplete_fields = ('author',)
 
-    @display(description='Количество избранных рецептов')
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            favorites_count=related_count(Favourite, 'recipe'))
+
+    def schedule_deletion(self, obj):
+        schedule_recipe_deletion(obj)
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        if settings.RECIPE_READ_MODEL:
+            invalidate_snapshots(Recipe.objects.filter(pk=form.instance.pk))
+
+    @display(
+        description='Количество избранных рецептов',
+        ordering='favorites_count',
+    )
     def count_favorite(self, obj):
-        return obj.favorites.count()
+        return obj.favorites_count
 
 
 @admin.register(Ingredient)
-class IngredientAdmin(admin.ModelAdmin):
+class IngredientAdmin(ScalableAdmin, admin.ModelAdmin):
     """Отображение модели Ingredient."""
-    list_display = ('name', 'measurement_unit',)
-    inlines = (IngredientInline,)
+    list_display = ('name', 'measurement_unit', 'count_recipes',)
+    search_fields = ('name',)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            recipes_count=related_count(
+                IngredientInRecipe, 'ingredient'))
+
+    @display(description='Количество рецептов', ordering='recipes_count')
+    def count_recipes(self, obj):
+        return obj.recipes_count
 
 
 @admin.register(Tag)
@@ -37,12 +72,33 @@ class TagAdmin(admin.ModelAdmin):
 
 
 @admin.register(ShoppingCart)
-class ShoppingCartAdmin(admin.ModelAdmin):
+class ShoppingCartAdmin(ScalableAdmin, admin.ModelAdmin):
     """Отображение корзины покупок в админ-панели."""
     list_display = ('user', 'recipe',)
+    list_select_related = ('user', 'recipe')
+    autocomplete_fields = ('user', 'recipe')
 
 
 @admin.register(Favourite)
-class FavouriteAdmin(admin.ModelAdmin):
+class FavouriteAdmin(ScalableAdmin, admin.ModelAdmin):
     """Отображение избранных рецептов в админ-панели."""
     list_display = ('user', 'recipe',)
+    list_select_related = ('user', 'recipe')
+    autocomplete_fields = ('user', 'recipe')
+
+
+@admin.register(DeletionJob)
+class DeletionJobAdmin(admin.ModelAdmin):
+    """Ход фоновых удалений в админ-панели."""
+    list_display = (
+        'model', 'object_id', 'status', 'progress',
+        'created_at', 'finished_at',
+    )
+    list_filter = ('status', 'model')
+    readonly_fields = (
+        'model', 'object_id', 'status', 'progress', 'error', 'attempts',
+        'created_at', 'started_at', 'finished_at',
+    )
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,69 @@
+from datetime import timedelta
+
+from api.coalescing import bump
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from recipes.models import ArchivedCartItem, ShoppingCart, Tombstone
+
+
+def table(model):
+    return connection.ops.quote_name(model._meta.db_table)
+
+
+def column(model, name):
+    return connection.ops.quote_name(model._meta.get_field(name).column)
+
+
+class Command(BaseCommand):
+    """
+    Команда 'archive_carts' переносит строки корзины старше --days
+    в архив ArchivedCartItem пачками. Каждая пачка — один запрос
+    DELETE ... RETURNING с вставкой в архив и отметок об удалении
+    для клиентов синхронизации.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=90)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Архивация требует PostgreSQL.')
+        border = timezone.now() - timedelta(days=options['days'])
+        cart = {
+            name: column(ShoppingCart, name)
+            for name in ('id', 'user', 'recipe', 'updated_at')
+        }
+        archive = ', '.join(
+            column(ArchivedCartItem, name)
+            for name in ('user_id', 'recipe_id', 'added_at', 'archived_at'))
+        tombstone = ', '.join(
+            column(Tombstone, name)
+            for name in ('model', 'object_id', 'user_id', 'deleted_at'))
+        statement = (
+            f'WITH moved AS ('
+            f'DELETE FROM {table(ShoppingCart)} WHERE {cart["id"]} IN ('
+            f'SELECT {cart["id"]} FROM {table(ShoppingCart)} '
+            f'WHERE {cart["updated_at"]} < %s LIMIT %s) '
+            f'RETURNING {cart["user"]} AS user_id, '
+            f'{cart["recipe"]} AS recipe_id, '
+            f'{cart["updated_at"]} AS updated_at), '
+            f'archived AS ('
+            f'INSERT INTO {table(ArchivedCartItem)} ({archive}) '
+            f'SELECT user_id, recipe_id, updated_at, now() FROM moved) '
+            f'INSERT INTO {table(Tombstone)} ({tombstone}) '
+            f"SELECT 'shopping_cart', recipe_id, user_id, now() FROM moved "
+            f'RETURNING {column(Tombstone, "user_id")}'
+        )
+        total = 0
+        while True:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(statement, [border, options['batch_size']])
+                moved = [row[0] for row in cursor.fetchall()]
+            if not moved:
+                break
+            total += len(moved)
+            for user_id in set(moved):
+                bump(f'cart:{user_id}')
+        print(f'Перенесено в архив строк корзины: {total}.')
@@ -0,0 +1,96 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from recipes.models import Favourite, Recipe, RecipeScore, ShoppingCart
+
+
+def table(model):
+    return connection.ops.quote_name(model._meta.db_table)
+
+
+def column(model, name):
+    return connection.ops.quote_name(model._meta.get_field(name).column)
+
+
+class Command(BaseCommand):
+    """
+    Команда 'compute_rankings' пересчитывает рейтинги рецептов для
+    ?ordering=trending и ?ordering=popular. Запускается по расписанию,
+    например из cron раз в 10 минут.
+
+    Рейтинги считаются одним запросом в БД и записываются через
+    INSERT ... ON CONFLICT DO UPDATE: строки обновляются на месте,
+    читатели всё время видят либо прежние, либо новые значения.
+    Строки, рейтинги которых не изменились, не перезаписываются.
+    Для trending читаются только действия за окно WINDOW_DAYS
+    (по индексу updated_at), для popular — только recipe_id.
+    """
+
+    def activity(self, model):
+        return (
+            f'SELECT {column(model, "recipe")} AS recipe_id, '
+            f'{column(model, "updated_at")} AS updated_at, '
+            f'%s::double precision AS weight FROM {table(model)} '
+            f'WHERE {column(model, "updated_at")} >= %s'
+        )
+
+    def recipes(self, model):
+        return (
+            f'SELECT {column(model, "recipe")} AS recipe_id '
+            f'FROM {table(model)}'
+        )
+
+    def statement(self):
+        recipe_id = column(RecipeScore, 'recipe')
+        trending = column(RecipeScore, 'trending')
+        popular = column(RecipeScore, 'popular')
+        return (
+            f'WITH activity AS ({self.activity(Favourite)} '
+            f'UNION ALL {self.activity(ShoppingCart)}), '
+            f'trending AS ('
+            f'SELECT recipe_id, '
+            f'SUM(weight * power(0.5, EXTRACT(EPOCH FROM %s - updated_at)'
+            f' / %s)) AS value '
+            f'FROM activity GROUP BY recipe_id), '
+            f'popular AS ('
+            f'SELECT recipe_id, COUNT(*) AS value '
+            f'FROM ({self.recipes(Favourite)} '
+            f'UNION ALL {self.recipes(ShoppingCart)}) AS added '
+            f'GROUP BY recipe_id) '
+            f'INSERT INTO {table(RecipeScore)} AS score ({recipe_id}, '
+            f'{trending}, {popular}, '
+            f'{column(RecipeScore, "computed_at")}) '
+            f'SELECT recipe.{column(Recipe, "id")}, '
+            f'COALESCE(trending.value, 0), COALESCE(popular.value, 0), %s '
+            f'FROM {table(Recipe)} recipe '
+            f'LEFT JOIN trending '
+            f'ON trending.recipe_id = recipe.{column(Recipe, "id")} '
+            f'LEFT JOIN popular '
+            f'ON popular.recipe_id = recipe.{column(Recipe, "id")} '
+            f'WHERE recipe.{column(Recipe, "deleted_at")} IS NULL '
+            f'ON CONFLICT ({recipe_id}) DO UPDATE SET '
+            + ', '.join(
+                f'{name} = EXCLUDED.{name}' for name in (
+                    trending, popular, column(RecipeScore, 'computed_at'),
+                )
+            )
+            + f' WHERE (score.{trending}, score.{popular}) '
+            f'IS DISTINCT FROM (EXCLUDED.{trending}, EXCLUDED.{popular})'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Пересчёт рейтингов требует PostgreSQL.')
+        config = settings.TRENDING
+        now = timezone.now()
+        since = now - timedelta(days=config['WINDOW_DAYS'])
+        with connection.cursor() as cursor:
+            cursor.execute(self.statement(), [
+                config['FAVORITE_WEIGHT'], since, config['CART_WEIGHT'], since,
+                now, config['HALF_LIFE_HOURS'] * 3600, now,
+            ])
+            count = cursor.rowcount
+        print(f'Обновлены рейтинги {count} рецептов.')
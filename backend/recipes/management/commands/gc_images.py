@@ -0,0 +1,60 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    """
+    Команда 'gc_images' удаляет изображения рецептов, на которые не
+    ссылается ни один рецепт: после удаления рецептов и замены
+    изображений. Файлы моложе --min-age не трогаются, чтобы не удалить
+    загрузку, рецепт которой ещё не сохранён.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--min-age', type=float, default=24,
+            help='Минимальный возраст удаляемого файла, ч.')
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        field = Recipe._meta.get_field('image')
+        storage = field.storage
+        border = timezone.now() - timedelta(hours=options['min_age'])
+        checked = removed = 0
+        batch = []
+        for name in self.walk(storage, field.upload_to.strip('/')):
+            batch.append(name)
+            if len(batch) >= options['batch_size']:
+                removed += self.collect(storage, batch, border, options)
+                checked += len(batch)
+                batch = []
+        if batch:
+            removed += self.collect(storage, batch, border, options)
+            checked += len(batch)
+        action = 'К удалению' if options['dry_run'] else 'Удалено'
+        print(f'Проверено файлов: {checked}. {action}: {removed}.')
+
+    def walk(self, storage, path):
+        directories, files = storage.listdir(path)
+        for name in files:
+            yield f'{path}/{name}'
+        for directory in directories:
+            yield from self.walk(storage, f'{path}/{directory}')
+
+    def collect(self, storage, batch, border, options):
+        referenced = set(
+            Recipe.objects.filter(image__in=batch)
+            .values_list('image', flat=True)
+        )
+        removed = 0
+        for name in batch:
+            if name in referenced or storage.get_modified_time(name) > border:
+                continue
+            if not options['dry_run']:
+                storage.delete(name)
+            removed += 1
+        return removed
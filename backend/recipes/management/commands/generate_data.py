@@ -0,0 +1,170 @@
+import io
+import random
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from PIL import Image
+from recipes.models import (Favourite, Ingredient, IngredientInRecipe, Recipe,
+                            ShoppingCart, Tag)
+from users.models import Subscribe
+
+User = get_user_model()
+
+BENCH_PREFIX = 'bench'
+BENCH_IMAGE = 'recipes/bench.png'
+BENCH_TAGS = (
+    ('Завтрак', '#E26C2D', 'breakfast'),
+    ('Обед', '#49B64E', 'lunch'),
+    ('Ужин', '#8775D2', 'dinner'),
+    ('Десерт', '#F2C14E', 'dessert'),
+    ('Выпечка', '#5C8DDF', 'bakery'),
+)
+
+
+class Command(BaseCommand):
+    """
+    Команда 'generate_data' наполняет базу синтетическими
+    пользователями, рецептами, избранным, корзинами и подписками
+    для нагрузочного тестирования API.
+    """
+
+    help = 'Генерация синтетических данных для бенчмарков.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--recipes', type=int, default=1000)
+        parser.add_argument(
+            '--ingredients-per-recipe', type=int, default=8)
+        parser.add_argument('--favorites', type=int, default=5000)
+        parser.add_argument('--carts', type=int, default=2000)
+        parser.add_argument('--subscriptions', type=int, default=1000)
+        parser.add_argument('--password', default='benchmark-password')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument(
+            '--clear', action='store_true',
+            help='Удалить ранее сгенерированные данные.')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        if options['clear']:
+            self.clear()
+        if not Ingredient.objects.exists():
+            call_command('load_ingredients')
+        with transaction.atomic():
+            tags = self.create_tags()
+            users = self.create_users(options['users'], options['password'])
+            recipes = self.create_recipes(
+                options['recipes'], users, tags,
+                options['ingredients_per_recipe'])
+            self.create_pairs(
+                Favourite, 'user', 'recipe', users, recipes,
+                options['favorites'])
+            self.create_pairs(
+                ShoppingCart, 'user', 'recipe', users, recipes,
+                options['carts'])
+            self.create_pairs(
+                Subscribe, 'user', 'author', users, users,
+                options['subscriptions'])
+            # bulk_create минует subscribe: счётчики подписок
+            # пересчитываются по таблице.
+            call_command('recount_follows', stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано: пользователей {len(users)}, '
+            f'рецептов {len(recipes)}.'))
+
+    def clear(self):
+        User.objects.filter(username__startswith=BENCH_PREFIX).delete()
+        self.stdout.write('Предыдущие данные удалены.')
+
+    def create_tags(self):
+        for name, color, slug in BENCH_TAGS:
+            Tag.objects.get_or_create(
+                slug=slug, defaults={'name': name, 'color': color})
+        return list(Tag.objects.all())
+
+    def create_users(self, count, password):
+        password = make_password(password)
+        start = User.objects.filter(
+            username__startswith=BENCH_PREFIX).count()
+        User.objects.bulk_create(
+            (User(
+                username=f'{BENCH_PREFIX}{number}',
+                email=f'{BENCH_PREFIX}{number}@example.com',
+                first_name='Бенчмарк',
+                last_name=str(number),
+                password=password,
+            ) for number in range(start, start + count)),
+            batch_size=self.batch_size,
+        )
+        return list(User.objects.filter(username__startswith=BENCH_PREFIX))
+
+    def create_image(self):
+        if not default_storage.exists(BENCH_IMAGE):
+            buffer = io.BytesIO()
+            Image.new('RGB', (64, 64), '#49B64E').save(buffer, 'PNG')
+            default_storage.save(BENCH_IMAGE, ContentFile(buffer.getvalue()))
+        return BENCH_IMAGE
+
+    def create_recipes(self, count, users, tags, ingredients_per_recipe):
+        image = self.create_image()
+        last_id = Recipe.objects.order_by('-id').values_list(
+            'id', flat=True).first() or 0
+        Recipe.objects.bulk_create(
+            (Recipe(
+                name=f'Рецепт {number}',
+                author=self.rng.choice(users),
+                image=image,
+                text='Описание рецепта. ' * self.rng.randint(5, 50),
+                cooking_time=self.rng.randint(5, 180),
+            ) for number in range(count)),
+            batch_size=self.batch_size,
+        )
+        recipes = list(Recipe.objects.filter(id__gt=last_id))
+        ingredient_ids = list(Ingredient.objects.values_list('id', flat=True))
+        recipe_tags = []
+        amounts = []
+        for recipe in recipes:
+            for tag in self.rng.sample(tags, self.rng.randint(1, 3)):
+                recipe_tags.append(
+                    Recipe.tags.through(recipe_id=recipe.id, tag_id=tag.id))
+            for ingredient_id in self.rng.sample(
+                    ingredient_ids,
+                    min(ingredients_per_recipe, len(ingredient_ids))):
+                amounts.append(IngredientInRecipe(
+                    recipe_id=recipe.id,
+                    ingredient_id=ingredient_id,
+                    amount=self.rng.randint(1, 500),
+                ))
+        Recipe.tags.through.objects.bulk_create(
+            recipe_tags, batch_size=self.batch_size)
+        IngredientInRecipe.objects.bulk_create(
+            amounts, batch_size=self.batch_size)
+        return recipes
+
+    def create_pairs(self, model, left, right, lefts, rights, count):
+        """Создание уникальных пар (пользователь, объект) для модели."""
+        if not lefts or not rights:
+            return
+        capacity = len(lefts) * len(rights)
+        if model is Subscribe:
+            capacity -= len(lefts)
+        count = min(count, capacity)
+        pairs = set()
+        while len(pairs) < count:
+            first = self.rng.choice(lefts)
+            second = self.rng.choice(rights)
+            if first.id != second.id or model is not Subscribe:
+                pairs.add((first.id, second.id))
+        model.objects.bulk_create(
+            (model(**{f'{left}_id': first, f'{right}_id': second})
+             for first, second in pairs),
+            batch_size=self.batch_size,
+            ignore_conflicts=True,
+        )
@@ -0,0 +1,114 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from recipes.models import Favourite, ShoppingCart
+
+# PARTITION BY HASH и первичные ключи секционированных таблиц
+# появились в PostgreSQL 11.
+MIN_PG_VERSION = 110000
+
+MODELS = {
+    'favourite': Favourite,
+    'shopping_cart': ShoppingCart,
+}
+
+
+class Command(BaseCommand):
+    """
+    Команда 'partition_user_tables' преобразует таблицы избранного и
+    корзины в секционированные по хешу user_id (PostgreSQL 11+): поиск
+    по пользователю затрагивает одну небольшую секцию и её индексы.
+
+    Таблица пересоздаётся под блокировкой с копированием данных,
+    поэтому команду запускают после migrate в окно обслуживания.
+    Ограничения и индексы, созданные Django, сохраняют свои имена;
+    первичный ключ дополняется user_id, как того требует PostgreSQL:
+    в БД он становится составным (id, user_id), для ORM остаётся id.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--partitions', type=int, default=16)
+        parser.add_argument(
+            'tables', nargs='*', choices=sorted(MODELS),
+            help='По умолчанию — обе таблицы.')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Секционирование требует PostgreSQL.')
+        if connection.pg_version < MIN_PG_VERSION:
+            raise CommandError(
+                'Секционирование по хешу требует PostgreSQL 11 или новее.')
+        for name in options['tables'] or sorted(MODELS):
+            model = MODELS[name]
+            if self.is_partitioned(model._meta.db_table):
+                print(f'{model._meta.db_table} уже секционирована.')
+                continue
+            with transaction.atomic():
+                self.partition(model, options['partitions'])
+
+    def is_partitioned(self, table):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT relkind FROM pg_class WHERE oid = %s::regclass',
+                [table])
+            return cursor.fetchone()[0] == 'p'
+
+    def partition(self, model, partitions):
+        table = model._meta.db_table
+        key = model._meta.get_field('user').column
+        quote = connection.ops.quote_name
+        old = f'{table}_unpartitioned'
+        with connection.cursor() as cursor:
+            cursor.execute(f'LOCK TABLE {quote(table)} IN EXCLUSIVE MODE')
+            cursor.execute(
+                'SELECT conname, contype, pg_get_constraintdef(oid) '
+                'FROM pg_constraint WHERE conrelid = %s::regclass',
+                [table])
+            constraints = cursor.fetchall()
+            cursor.execute(
+                'SELECT indexdef FROM pg_indexes WHERE tablename = %s '
+                'AND indexname NOT IN ('
+                'SELECT conname FROM pg_constraint '
+                'WHERE conrelid = %s::regclass)',
+                [table, table])
+            indexes = [row[0] for row in cursor.fetchall()]
+            cursor.execute(
+                'SELECT pg_get_serial_sequence(%s, %s)',
+                [table, model._meta.pk.column])
+            sequence = cursor.fetchone()[0]
+
+            cursor.execute(
+                f'ALTER TABLE {quote(table)} RENAME TO {quote(old)}')
+            cursor.execute(
+                f'CREATE TABLE {quote(table)} '
+                f'(LIKE {quote(old)} INCLUDING DEFAULTS) '
+                f'PARTITION BY HASH ({quote(key)})')
+            for remainder in range(partitions):
+                cursor.execute(
+                    f'CREATE TABLE {quote(f"{table}_p{remainder}")} '
+                    f'PARTITION OF {quote(table)} FOR VALUES WITH '
+                    f'(MODULUS {partitions}, REMAINDER {remainder})')
+            cursor.execute(
+                f'INSERT INTO {quote(table)} SELECT * FROM {quote(old)}')
+            rows = cursor.rowcount
+            if sequence:
+                cursor.execute(
+                    f'ALTER SEQUENCE {sequence} OWNED BY '
+                    f'{quote(table)}.{quote(model._meta.pk.column)}')
+            cursor.execute(f'DROP TABLE {quote(old)}')
+
+            for name, kind, definition in constraints:
+                if kind == 'p':
+                    definition = (
+                        f'PRIMARY KEY ({quote(model._meta.pk.column)}, '
+                        f'{quote(key)})')
+                elif kind == 'u' and key not in definition:
+                    raise CommandError(
+                        f'Ограничение {name} не содержит {key}: '
+                        f'секционирование по {key} невозможно.')
+                cursor.execute(
+                    f'ALTER TABLE {quote(table)} ADD CONSTRAINT '
+                    f'{quote(name)} {definition}')
+            for definition in indexes:
+                cursor.execute(definition)
+        print(
+            f'{table}: {partitions} секций, перенесено строк: {rows}.')
@@ -0,0 +1,21 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from recipes.models import Tombstone
+
+
+class Command(BaseCommand):
+    """
+    Команда 'purge_tombstones' удаляет отметки об удалении старше
+    SYNC_TOMBSTONE_RETENTION_DAYS. Клиенты с более старым курсором
+    получают полный снимок.
+    """
+
+    def handle(self, *args, **options):
+        border = timezone.now() - timedelta(
+            days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+        deleted, _ = Tombstone.objects.filter(
+            deleted_at__lt=border).delete()
+        print(f'Удалено отметок: {deleted}.')
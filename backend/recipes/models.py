@@ -1,6 +1,9 @@
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator
 from django.db import models
+from django.db.models.functions import Collate, Upper
+
+from .storage import ContentHashStorage
 
 User = get_user_model()
 
@@ -10,6 +13,11 @@ class Tag(models.Model):
     name = models.CharField('Название', max_length=200, unique=True)
     color = models.CharField('Цветовой HEX-код', max_length=7, unique=True)
     slug = models.SlugField('Уникальный слаг', max_length=200, unique=True)
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True,
+        db_index=True,
+    )
 
     class Meta:
         verbose_name = 'Тег'
@@ -21,21 +29,41 @@ class Tag(models.Model):
 
 class Ingredient(models.Model):
     """Модель ингридиентов."""
-    name = models.CharField('Название', max_length=200)
+    name = models.CharField('Название', max_length=200, db_index=True)
     measurement_unit = models.CharField('Единица измерения', max_length=200)
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True,
+        db_index=True,
+    )
 
     class Meta:
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
         ordering = ('name',)
+        indexes = [
+            # Поиск по началу названия без учёта регистра (istartswith)
+            # в API и админке: индекс с сортировкой "C" подходит для
+            # UPPER(name) LIKE 'X%'.
+            models.Index(
+                Collate(Upper('name'), 'C'), name='ingredient_name_upper'),
+        ]
 
     def __str__(self):
         return f'{self.name}, {self.measurement_unit}'
 
 
+class ActiveRecipeManager(models.Manager):
+    """Рецепты без отметки об удалении."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class Recipe(models.Model):
     """Модель рецептов."""
-    name = models.CharField(verbose_name='Название', max_length=200)
+    name = models.CharField(
+        verbose_name='Название', max_length=200, db_index=True)
     tags = models.ManyToManyField(
         Tag, related_name='recipes', verbose_name='Теги')
     author = models.ForeignKey(
@@ -53,6 +81,8 @@ class Recipe(models.Model):
     image = models.ImageField(
         verbose_name='Изображение',
         upload_to='recipes/',
+        storage=ContentHashStorage(),
+        db_index=True,
     )
     text = models.TextField(verbose_name='Описание',)
     cooking_time = models.PositiveIntegerField(
@@ -65,20 +95,59 @@ class Recipe(models.Model):
         verbose_name='Дата публикации',
         auto_now_add=True,
     )
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True,
+        db_index=True,
+    )
+    snapshot = models.JSONField(
+        verbose_name='Снимок для чтения',
+        null=True,
+        blank=True,
+        editable=False,
+    )
+    # Рецепт, поставленный в очередь на фоновое удаление, сразу
+    # исчезает из objects; удаляет его run_deletion_worker.
+    deleted_at = models.DateTimeField(
+        verbose_name='Дата удаления',
+        null=True,
+        blank=True,
+        editable=False,
+    )
+
+    objects = ActiveRecipeManager()
+    all_objects = models.Manager()
 
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ('-pub_date',)
+        indexes = [
+            # Лента по умолчанию и лента автора читаются по индексу
+            # без сортировки всей таблицы.
+            models.Index(fields=['-pub_date'], name='recipe_pub_date'),
+            models.Index(
+                fields=['author', '-pub_date'],
+                name='recipe_author_pub_date'
+            ),
+            models.Index(
+                Collate(Upper('name'), 'C'), name='recipe_name_upper'),
+            # Очередь пересборки сброшенных снимков (rebuild_snapshots
+            # --watch): индекс содержит только строки без снимка.
+            models.Index(
+                fields=['id'], name='recipe_snapshot_missing',
+                condition=models.Q(snapshot__isnull=True),
+            ),
+        ]
 
-    '''def is_favorited(self, user):
+    def is_favorited(self, user):
         return self.favorites.filter(user=user).exists()
 
     def is_in_shopping_cart(self, user):
-        return self.shopping.filter(user=user).exists()
+        return self.shopping_cart.filter(user=user).exists()
 
     def __str__(self):
-        return self.name'''
+        return self.name
 
 
 class IngredientInRecipe(models.Model):
@@ -117,7 +186,15 @@ class IngredientInRecipe(models.Model):
 
 
 class Favourite(models.Model):
-    """Модель избранных рецептов."""
+    """
+    Модель избранных рецептов.
+
+    Команда partition_user_tables секционирует таблицу по user_id,
+    и первичный ключ в БД становится составным (id, user_id). Для ORM
+    первичным ключом остаётся id: он по-прежнему уникален, потому что
+    выдаётся общей последовательностью. Уникальные ограничения
+    и внешние ключи на эту таблицу должны включать user_id.
+    """
     user = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -130,6 +207,11 @@ class Favourite(models.Model):
         related_name='favorites',
         verbose_name='Рецепт'
     )
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True,
+        db_index=True,
+    )
 
     class Meta:
         verbose_name = 'Избранное'
@@ -146,7 +228,15 @@ class Favourite(models.Model):
 
 
 class ShoppingCart(models.Model):
-    """Модель списка покупок."""
+    """
+    Модель списка покупок.
+
+    Команда partition_user_tables секционирует таблицу по user_id,
+    и первичный ключ в БД становится составным (id, user_id). Для ORM
+    первичным ключом остаётся id: он по-прежнему уникален, потому что
+    выдаётся общей последовательностью. Уникальные ограничения
+    и внешние ключи на эту таблицу должны включать user_id.
+    """
     user = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -159,6 +249,11 @@ class ShoppingCart(models.Model):
         related_name='shopping_cart',
         verbose_name='Рецепт'
     )
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True,
+        db_index=True,
+    )
 
     class Meta:
         verbose_name = 'Корзина покупок'
@@ -172,3 +267,177 @@ class ShoppingCart(models.Model):
 
     def __str__(self):
         return f'{self.user} добавил {self.recipe} в Корзину покупок.'
+
+
+class RecipeScore(models.Model):
+    """Рейтинги рецепта, пересчитываемые командой compute_rankings."""
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='score',
+        verbose_name='Рецепт',
+    )
+    trending = models.FloatField('Популярность сейчас', default=0)
+    popular = models.PositiveIntegerField(
+        'Популярность за всё время', default=0)
+    computed_at = models.DateTimeField('Дата расчёта', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Рейтинг рецепта'
+        verbose_name_plural = 'Рейтинги рецептов'
+        indexes = [
+            models.Index(
+                fields=['-trending', '-recipe'],
+                name='recipe_score_trending'
+            ),
+            models.Index(
+                fields=['-popular', '-recipe'],
+                name='recipe_score_popular'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.recipe_id}: {self.trending:.3f} / {self.popular}'
+
+
+class ArchivedCartItem(models.Model):
+    """
+    Строка корзины, перенесённая командой archive_carts из горячей
+    таблицы ShoppingCart в архив.
+    """
+    # Не внешние ключи: архив не должен мешать удалению пользователей
+    # и рецептов и не нуждается в индексах горячей таблицы.
+    user_id = models.PositiveBigIntegerField('ID пользователя')
+    recipe_id = models.PositiveBigIntegerField('ID рецепта')
+    added_at = models.DateTimeField('Дата добавления')
+    archived_at = models.DateTimeField('Дата архивации', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Архивная строка корзины'
+        verbose_name_plural = 'Архив корзин'
+        indexes = [
+            models.Index(fields=['user_id'], name='archived_cart_user'),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id}: {self.recipe_id}'
+
+
+class Job(models.Model):
+    """Общие поля заданий очереди в БД, забираемых воркерами."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Готово'),
+        (FAILED, 'Ошибка'),
+    )
+    status = models.CharField(
+        'Статус', max_length=10, choices=STATUSES, default=PENDING)
+    error = models.TextField('Ошибка', blank=True)
+    attempts = models.PositiveSmallIntegerField('Попытки', default=0)
+    created_at = models.DateTimeField('Дата создания', auto_now_add=True)
+    started_at = models.DateTimeField('Дата запуска', null=True, blank=True)
+    finished_at = models.DateTimeField(
+        'Дата завершения', null=True, blank=True)
+
+    class Meta:
+        abstract = True
+
+
+class ExportJob(Job):
+    """Задание фоновой выгрузки, выполняемое run_export_worker."""
+    SHOPPING_LIST = 'shopping_list'
+    KINDS = (
+        (SHOPPING_LIST, 'Список покупок'),
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='export_jobs',
+        verbose_name='Пользователь'
+    )
+    kind = models.CharField(
+        'Тип', max_length=50, choices=KINDS, default=SHOPPING_LIST)
+    fingerprint = models.CharField('Отпечаток данных', max_length=40)
+    file = models.FileField('Файл', upload_to='exports/', blank=True)
+
+    class Meta:
+        verbose_name = 'Выгрузка'
+        verbose_name_plural = 'Выгрузки'
+        indexes = [
+            models.Index(
+                fields=['status', 'created_at'],
+                name='export_job_queue'
+            ),
+            models.Index(
+                fields=['user', 'kind', 'fingerprint'],
+                name='export_job_result'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.get_kind_display()} для {self.user}: {self.status}'
+
+
+class DeletionJob(Job):
+    """
+    Задание фонового удаления пользователя или рецепта, выполняемое
+    run_deletion_worker. Объект скрыт сразу, зависимые строки удаляются
+    пачками; progress — число удалённых строк по таблицам.
+    """
+    USER = 'user'
+    RECIPE = 'recipe'
+    MODELS = (
+        (USER, 'Пользователь'),
+        (RECIPE, 'Рецепт'),
+    )
+    # Не внешний ключ: объект удаляется раньше задания.
+    model = models.CharField('Модель', max_length=10, choices=MODELS)
+    object_id = models.PositiveBigIntegerField('ID объекта')
+    progress = models.JSONField('Прогресс', default=dict, blank=True)
+
+    class Meta:
+        verbose_name = 'Удаление'
+        verbose_name_plural = 'Удаления'
+        indexes = [
+            models.Index(
+                fields=['status', 'created_at'],
+                name='deletion_job_queue'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.get_model_display()} {self.object_id}: {self.status}'
+
+
+class Tombstone(models.Model):
+    """Отметка об удалении объекта для инкрементальной синхронизации."""
+    model = models.CharField('Модель', max_length=50)
+    object_id = models.PositiveBigIntegerField('ID объекта')
+    # Не внешний ключ: отметки для избранного и корзины создаются и при
+    # каскадном удалении самого пользователя.
+    user_id = models.PositiveBigIntegerField(
+        'ID пользователя', null=True, blank=True)
+    deleted_at = models.DateTimeField(
+        verbose_name='Дата удаления',
+        auto_now_add=True,
+        db_index=True,
+    )
+
+    class Meta:
+        verbose_name = 'Удалённый объект'
+        verbose_name_plural = 'Удалённые объекты'
+        indexes = [
+            models.Index(
+                fields=['user_id', 'deleted_at'],
+                name='tombstone_user_deleted_at'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.model} {self.object_id}'
@@ -0,0 +1,47 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import (ExportJob, Favourite, Ingredient, Recipe, RecipeScore,
+                     ShoppingCart, Tag, Tombstone)
+
+SHARED_MODELS = {
+    Recipe: 'recipes',
+    Tag: 'tags',
+    Ingredient: 'ingredients',
+}
+USER_MODELS = {
+    Favourite: 'favorites',
+    ShoppingCart: 'shopping_cart',
+}
+
+
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+@receiver(post_delete, sender=Favourite)
+@receiver(post_delete, sender=ShoppingCart)
+def create_tombstone(sender, instance, **kwargs):
+    """Запись об удалении для клиентов инкрементальной синхронизации."""
+    if sender in SHARED_MODELS:
+        Tombstone.objects.create(
+            model=SHARED_MODELS[sender], object_id=instance.pk)
+    elif sender in USER_MODELS:
+        Tombstone.objects.create(
+            model=USER_MODELS[sender],
+            object_id=instance.recipe_id,
+            user_id=instance.user_id,
+        )
+
+
+@receiver(post_save, sender=Recipe)
+def create_score(sender, instance, created, **kwargs):
+    """Новый рецепт попадает в рейтинги с нулевыми оценками до пересчёта."""
+    if created:
+        RecipeScore.objects.get_or_create(recipe=instance)
+
+
+@receiver(post_delete, sender=ExportJob)
+def delete_export_file(sender, instance, **kwargs):
+    """Файл выгрузки удаляется вместе с заданием."""
+    if instance.file:
+        instance.file.delete(save=False)
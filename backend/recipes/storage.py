@@ -0,0 +1,38 @@
+import hashlib
+import os
+import uuid
+
+from django.core.files.storage import FileSystemStorage
+
+
+class ContentHashStorage(FileSystemStorage):
+    """
+    Хранилище, именующее файлы по SHA-256 содержимого:
+    <каталог>/ab/cdef...png. Одинаковые загрузки сохраняются один раз,
+    а содержимое файла по имени никогда не меняется, поэтому nginx
+    отдаёт такие файлы с неизменяемым Cache-Control.
+    """
+
+    def hashed_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        digest = digest.hexdigest()
+        directory, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        return os.path.join(
+            directory, digest[:2], f'{digest[2:]}{extension}')
+
+    def _save(self, name, content):
+        name = self.hashed_name(name, content)
+        if self.exists(name):
+            # Свежее время изменения защищает файл от gc_images, пока
+            # ссылающийся на него рецепт ещё не сохранён.
+            os.utime(self.path(name))
+            return name
+        # Запись во временный файл и атомарная замена: при одновременной
+        # загрузке одинаковых файлов оба процесса пишут одно содержимое.
+        temporary = super()._save(f'{name}.{uuid.uuid4().hex}.tmp', content)
+        os.replace(self.path(temporary), self.path(name))
+        return name
@@ -1,9 +1,11 @@
+from api.deletion import schedule_user_deletion
 from django.contrib import admin
+from foodgram.admin import BackgroundDeletionMixin, ScalableAdmin
 from users.models import Subscribe, User
 
 
 @admin.register(User)
-class UserAdmin(admin.ModelAdmin):
+class UserAdmin(BackgroundDeletionMixin, ScalableAdmin, admin.ModelAdmin):
     list_display = (
         'username',
         'id',
@@ -11,9 +13,22 @@ class UserAdmin(admin.ModelAdmin):
         'first_name',
         'last_name',
     )
-    list_filter = ('username', 'email')
+    list_filter = ('is_staff', 'is_active')
+    search_fields = ('username', 'email')
+
+    def schedule_deletion(self, obj):
+        schedule_user_deletion(obj)
 
 
 @admin.register(Subscribe)
-class SubscribeAdmin(admin.ModelAdmin):
+class SubscribeAdmin(ScalableAdmin, admin.ModelAdmin):
     list_display = ('user', 'author')
+    list_select_related = ('user', 'author')
+    autocomplete_fields = ('user', 'author')
+
+    def get_readonly_fields(self, request, obj=None):
+        # Счётчики подписок меняют сигналы создания и удаления
+        # подписки; смена пары у существующей строки их бы обошла.
+        if obj is not None:
+            return ('user', 'author')
+        return ()
@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models.functions import Collate, Upper
 
 
 class User(AbstractUser):
@@ -32,11 +33,22 @@ class User(AbstractUser):
         blank=False
     )
     password = models.CharField('Password', max_length=150)
+    followers_count = models.PositiveIntegerField(
+        'Подписчиков', default=0, editable=False)
+    following_count = models.PositiveIntegerField(
+        'Подписок', default=0, editable=False)
 
     class Meta:
         verbose_name = 'Пользователь'
         verbose_name_plural = 'Пользователи'
         ordering = ['pk']
+        indexes = [
+            # Поиск в админке по началу username и email.
+            models.Index(
+                Collate(Upper('username'), 'C'), name='user_username_upper'),
+            models.Index(
+                Collate(Upper('email'), 'C'), name='user_email_upper'),
+        ]
 
     def __str__(self):
         return self.username
@@ -66,3 +78,9 @@ class Subscribe(models.Model):
                 name='unique_user_author'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=['author', 'user'],
+                name='subscribe_author_user'
+            ),
+        ]
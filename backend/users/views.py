@@ -1,23 +1,52 @@
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from django.shortcuts import get_object_or_404
+from djoser import utils
 from djoser.views import UserViewSet
 from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from api.pagination import LimitPageNumberPagination
+from api.coalescing import coalesce, versions
+from api.deletion import schedule_user_deletion
+from api.mixins import BatchListMixin
+from api.pagination import KeysetPagination, LimitPageNumberPagination
+from api.querysets import users_for_read
 from .models import Subscribe
-from api.serializers import CustomUserSerializer, SubscriptionSerializer
+from api.serializers import (SubscriptionSerializer, UserProfileSerializer,
+                             requested_fields)
 
 User = get_user_model()
 
 
-class CustomUserViewSet(UserViewSet):
+class CustomUserViewSet(BatchListMixin, UserViewSet):
     """Djoser класс пользователя с методами управления подписками."""
     queryset = User.objects.all()
-    serializer_class = CustomUserSerializer
+    serializer_class = UserProfileSerializer
     pagination_class = LimitPageNumberPagination
+    throttle_scopes = {'subscribe': 'subscriptions'}
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('list', 'retrieve'):
+            return users_for_read(
+                self.request.user, queryset.filter(is_active=True),
+                requested_fields(self.request))
+        return queryset
+
+    def get_instance(self):
+        """
+        Текущий пользователь для /users/me/ из БД: request.user
+        собран из кэша токенов и содержит только флаги доступа.
+        """
+        return users_for_read(self.request.user).get(pk=self.request.user.pk)
+
+    def perform_destroy(self, instance):
+        """Пользователь деактивируется сразу, удаляется в фоне."""
+        if instance == self.request.user:
+            utils.logout_user(self.request)
+        schedule_user_deletion(instance)
 
     @action(
         detail=True,
@@ -37,18 +66,47 @@ class CustomUserViewSet(UserViewSet):
                 context={"request": request}
             )
             serializer.is_valid(raise_exception=True)
-            Subscribe.objects.create(user=user, author=author)
+            with transaction.atomic():
+                _, created = Subscribe.objects.get_or_create(
+                    user=user, author=author)
+            if not created:
+                return Response(
+                    {'errors': 'Вы уже подписаны на этого автора.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
         if request.method == 'DELETE':
-            subscription = get_object_or_404(
-                Subscribe,
-                user=user,
-                author=author
-            )
-            subscription.delete()
+            with transaction.atomic():
+                deleted, _ = Subscribe.objects.filter(
+                    user=user, author=author).delete()
+            if not deleted:
+                return Response(
+                    {'errors': 'Вы не подписаны на этого автора.'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
             return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @action(
+        detail=True,
+        permission_classes=[IsAuthenticated]
+    )
+    def followers(self, request, **kwargs):
+        """Подписчики пользователя с пагинацией по ключу."""
+        author = get_object_or_404(User, id=self.kwargs.get('id'))
+        queryset = users_for_read(
+            request.user,
+            User.objects.filter(subscriber__author=author, is_active=True),
+        )
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = UserProfileSerializer(
+            page,
+            many=True,
+            context=self.get_serializer_context()
+        )
+        return paginator.get_paginated_response(serializer.data)
+
     @action(
         detail=False,
         permission_classes=[IsAuthenticated]
@@ -56,7 +114,17 @@ class CustomUserViewSet(UserViewSet):
     def subscriptions(self, request):
         """метод запроса подписок."""
         user = request.user
-        queryset = User.objects.filter(subscribing__user=user)
+        key = (
+            f'subscriptions:{user.pk}:'
+            f'{versions("recipes", f"subscriptions:{user.pk}")}:'
+            f'{request.get_full_path()}'
+        )
+        return Response(coalesce(key, lambda: self.list_subscriptions(
+            request).data))
+
+    def list_subscriptions(self, request):
+        queryset = User.objects.filter(
+            following__user=request.user, is_active=True)
         pages = self.paginate_queryset(queryset)
         serializer = SubscriptionSerializer(
             pages,